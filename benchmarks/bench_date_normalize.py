@@ -0,0 +1,110 @@
+"""
+日期正規化比較：舊版 format_date_value + strptime vs normalize_date
+
+產生混合格式的日期值（datetime、date、各種字串、Excel 序號、空值與無效值），
+先確認舊版可辨識的值兩者結果相同，再比較耗時
+用法：python benchmarks/bench_date_normalize.py [count]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, date, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main
+
+
+def legacy_format_date_value(value):
+    """重構前的 format_date_value（原樣保留供比較）"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, str):
+        value_str = value.strip()
+        if "/" in value_str:
+            try:
+                date_parts = value_str.split(" ")[0].split("/")
+                year = int(date_parts[0])
+                month = int(date_parts[1])
+                day = int(date_parts[2])
+                return datetime(year, month, day).strftime("%Y-%m-%d")
+            except:
+                pass
+        if " " in value_str or "T" in value_str:
+            date_part = value_str.split(" ")[0]
+            try:
+                datetime.strptime(date_part, "%Y-%m-%d")
+                return date_part
+            except ValueError:
+                pass
+        return value_str
+    return str(value)
+
+
+def legacy_parse(value):
+    """重構前 iter_sheet_items 的日期處理：先轉字串再 strptime"""
+    try:
+        return datetime.strptime(legacy_format_date_value(value), "%Y-%m-%d").date()
+    except:
+        return None
+
+
+def make_values(count, seed=0):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    values = []
+    for _ in range(count):
+        d = start + timedelta(days=rng.randrange(800))
+        kind = rng.randrange(10)
+        if kind == 0:
+            values.append(datetime(d.year, d.month, d.day, rng.randrange(24), rng.randrange(60)))
+        elif kind == 1:
+            values.append(d)
+        elif kind in (2, 3):
+            values.append(d.isoformat())
+        elif kind == 4:
+            values.append(f"{d.year}/{d.month}/{d.day}")
+        elif kind == 5:
+            values.append(f"{d.isoformat()} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00")
+        elif kind == 6:
+            values.append(f" {d.year}/{d.month:02d}/{d.day:02d} 08:00 ")
+        elif kind == 7:
+            values.append(float((d - date(1899, 12, 30)).days) + rng.choice((0, 0.5)))
+        elif kind == 8:
+            values.append(rng.choice((None, "", "待確認", "2024-02-30", "0205")))
+        else:
+            values.append((d - date(1899, 12, 30)).days)
+    return values
+
+
+def timed(func, values):
+    t0 = time.perf_counter()
+    result = [func(v) for v in values]
+    return result, time.perf_counter() - t0
+
+
+def main_bench(count):
+    values = make_values(count)
+    main._parse_date_text.cache_clear()
+    main._serial_to_date.cache_clear()
+    legacy, t_legacy = timed(legacy_parse, values)
+    current, t_current = timed(main.normalize_date, values)
+
+    mismatched = [(v, a, b) for v, a, b in zip(values, legacy, current) if a is not None and a != b]
+    if mismatched:
+        raise SystemExit(f"結果不一致：{mismatched[:5]}")
+    added = sum(1 for a, b in zip(legacy, current) if a is None and b is not None)
+    print(f"{count} 筆：舊版可辨識 {sum(a is not None for a in legacy)} 筆，結果一致；"
+          f"新增可辨識 {added} 筆（Excel 序號等）")
+    print(f"舊版 format_date_value + strptime：{t_legacy:.2f} 秒")
+    print(f"normalize_date：{t_current:.2f} 秒（{t_legacy / t_current:.1f}x）")
+    print(f"字串快取：{main._parse_date_text.cache_info()}")
+    print(f"序號快取：{main._serial_to_date.cache_info()}")
+
+
+if __name__ == "__main__":
+    main_bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,70 @@
+"""
+匯出引擎比較：legacy（寫入 → 儲存 → 重新載入格式化 → 再儲存）vs write_only（單次寫入）
+
+用法：python benchmarks/bench_export.py [rows ...]（預設 10000 50000 200000 筆詳細記錄）
+每組（引擎, 筆數）在獨立子程序執行，量測耗時與峰值RSS（ru_maxrss，僅限 Unix）
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+SHEETS = 4
+
+
+def make_records(rows):
+    import main
+    raw_data = {}
+    per_sheet = rows // SHEETS
+    base = date(2020, 1, 1).toordinal()
+    for s in range(SHEETS):
+        items = []
+        for r in range(per_sheet):
+            mmdd = date.fromordinal(base + r // 20).strftime("%m%d")
+            items.append(main.WorkRecord(base + r // 20, "處理中", f"作業{r % 50}",
+                                         f"{mmdd}完成初步分析|{mmdd}編寫接口文檔", f"附註{r % 7}；測試通過"))
+        raw_data[f"sheet{s + 1}"] = items
+    return raw_data
+
+
+def child(engine, rows, out_dir):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import main
+    raw_data = make_records(rows)
+    for items in raw_data.values():
+        for item in items:
+            item.sorted_notes  # 內容排序不列入匯出計時
+    fig, ax = plt.subplots(figsize=(9, 4), dpi=120)
+    ax.bar(range(10), range(10))
+    chart_png = main.render_chart_png(fig)
+    plt.close(fig)
+    t0 = time.perf_counter()
+    main.write_report_excel(os.path.join(out_dir, f"{engine}_{rows}.xlsx"), raw_data, list(raw_data),
+                            "2020-01-01", "2030-12-31", chart_png, engine=engine)
+    elapsed = time.perf_counter() - t0
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed}\t{peak_kb}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+        sys.exit(0)
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 50_000, 200_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'筆數':>8} {'引擎':>10} {'耗時':>9} {'峰值RSS':>10}")
+        for rows in sizes:
+            for engine in ("legacy", "write_only"):
+                out = subprocess.run([sys.executable, __file__, "--child", engine, str(rows), tmp],
+                                     capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+                elapsed, peak_kb = out.split("\t")
+                print(f"{rows:>8} {engine:>10} {float(elapsed):8.2f}s {int(peak_kb) / 1024:8.1f}MB")
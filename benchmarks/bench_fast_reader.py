@@ -0,0 +1,46 @@
+"""
+讀取引擎比較：openpyxl vs 直接串流 zip/XML（READER_ENGINE = "xml"）
+
+先確認兩種引擎對 test.xlsx 與產生的測試檔輸出完全相同，再比較讀取時間
+用法：python benchmarks/bench_fast_reader.py [rows_per_sheet]
+"""
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main
+from workbook_gen import generate_workbook
+
+
+def read(path, engine):
+    t0 = time.perf_counter()
+    result = main.read_excel_full_data(path, None, None, engine=engine)
+    return result, time.perf_counter() - t0
+
+
+def check_parity(path):
+    (expected, t_openpyxl), (actual, t_xml) = read(path, "openpyxl"), read(path, "xml")
+    if expected != actual:
+        for sheet_name in expected[0] or {}:
+            for a, b in zip(expected[0][sheet_name], (actual[0] or {}).get(sheet_name, [])):
+                if a != b:
+                    print(f"  差異 [{sheet_name}]\n    openpyxl: {a}\n    xml:      {b}")
+                    break
+        raise SystemExit(f"引擎輸出不一致：{path}")
+    rows = sum(len(v) for v in (expected[0] or {}).values())
+    print(f"{os.path.basename(path):>16}: {rows:>8} 筆  openpyxl {t_openpyxl:7.3f}s  xml {t_xml:7.3f}s")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    check_parity(os.path.join(os.path.dirname(HERE), "test.xlsx"))
+    with tempfile.TemporaryDirectory() as tmp:
+        small = generate_workbook(os.path.join(tmp, "mixed.xlsx"), sheets=3, rows_per_sheet=500, mixed_types=True)
+        check_parity(small)
+        large = generate_workbook(os.path.join(tmp, "large.xlsx"), sheets=4, rows_per_sheet=rows, mixed_types=True, seed=1)
+        check_parity(large)
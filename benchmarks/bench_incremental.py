@@ -0,0 +1,75 @@
+"""
+增量解析量測與正確性檢查（load_date_index 傳入舊索引）
+
+1. 檔案尾端新增列：只解析新增的列，結果與完整解析相同
+2. 修改前段的舊列：必須改為完整解析，且讀到修改後的內容（解析快取也要是新內容）
+用法：python benchmarks/bench_incremental.py [rows] [appended]
+"""
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main
+from openpyxl import load_workbook
+from workbook_gen import generate_workbook
+
+EDITED_STATUS = "已修改"
+
+
+def timed_load(path, previous=None):
+    t0 = time.perf_counter()
+    index, err = main.load_date_index(path, previous=previous)
+    if err:
+        raise SystemExit(f"讀取失敗：{err}")
+    return index, time.perf_counter() - t0
+
+
+def edit_workbook(path, func):
+    wb = load_workbook(path)
+    func(wb.active)
+    wb.save(path)
+
+
+def statuses(index):
+    return [x.status for _, items in index.sheets.values() for x in items]
+
+
+def run(rows, appended):
+    with tempfile.TemporaryDirectory() as tmp:
+        main.PARSE_CACHE_FILE = os.path.join(tmp, "parse_cache.db")
+        path = generate_workbook(os.path.join(tmp, "log.xlsx"), sheets=1, rows_per_sheet=rows)
+        first, t_full = timed_load(path)
+
+        edit_workbook(path, lambda ws: [ws.append(list(row)) for row in
+                                        ws.iter_rows(min_row=2, max_row=appended + 1, values_only=True)])
+        grown, t_incremental = timed_load(path, previous=first)
+        if grown.parsed_rows != appended:
+            raise SystemExit(f"新增 {appended} 列應只解析新增列，實際解析 {grown.parsed_rows} 筆")
+        main.parse_cache_invalidate()
+        reference, _ = timed_load(path)
+        if statuses(grown) != statuses(reference):
+            raise SystemExit("增量解析結果與完整解析不一致")
+
+        # 第10列（表頭下第9筆）的狀態欄
+        edit_workbook(path, lambda ws: setattr(ws["B10"], "value", EDITED_STATUS))
+        edited, t_edited = timed_load(path, previous=grown)
+        if edited.parsed_rows != rows + appended:
+            raise SystemExit(f"修改舊列後應完整解析 {rows + appended} 筆，實際解析 {edited.parsed_rows} 筆")
+        if EDITED_STATUS not in statuses(edited):
+            raise SystemExit("修改舊列後仍回傳舊內容")
+        cached, _ = timed_load(path)
+        if cached.source != "cache" or EDITED_STATUS not in statuses(cached):
+            raise SystemExit("解析快取仍保存修改前的內容")
+
+    print(f"{rows} 列：完整解析 {t_full:.3f}s；新增 {appended} 列後增量解析 {t_incremental:.3f}s"
+          f"（{t_full / t_incremental:.1f}x）；修改舊列後完整解析 {t_edited:.3f}s，結果正確")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50)
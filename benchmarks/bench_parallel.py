@@ -0,0 +1,38 @@
+"""
+逐一解析 vs 程序池平行解析（read_excel_full_data 的 workers 參數）
+
+用法：python benchmarks/bench_parallel.py [sheets] [rows_per_sheet] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main
+from workbook_gen import generate_workbook
+
+
+def timed(path, workers):
+    t0 = time.perf_counter()
+    raw_data, valid_sheets, err = main.read_excel_full_data(path, None, None, workers=workers)
+    if err:
+        raise SystemExit(err)
+    return raw_data, valid_sheets, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generate_workbook(os.path.join(tmp, "team.xlsx"), sheets=sheets, rows_per_sheet=rows)
+        seq_data, seq_sheets, t_seq = timed(path, 1)
+        par_data, par_sheets, t_par = timed(path, workers)
+        assert (seq_data, seq_sheets) == (par_data, par_sheets), "平行解析結果與逐一解析不一致"
+        print(f"{sheets} Sheet × {rows} 列")
+        print(f"  逐一解析        : {t_seq:7.3f}s")
+        print(f"  平行解析（{workers} 程序）: {t_par:7.3f}s  加速 {t_seq / t_par:4.2f}x")
@@ -0,0 +1,61 @@
+"""
+每筆記錄的記憶體用量（tracemalloc）：舊版字串鍵 dict vs WorkRecord
+
+用法：python benchmarks/bench_record_memory.py [rows]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main
+from workbook_gen import generate_workbook
+
+
+def as_legacy_dict(record):
+    """重構前每列建立的 dict（含日期物件與重複的日期字串）"""
+    return {
+        "更新日期": record.date_text,
+        "原始日期物件": record.date,
+        "狀態": record.status,
+        "作業名稱": record.title,
+        "目前進度": record.progress,
+        "附註描述": record.note,
+        "sorted_notes": record.sorted_notes,
+    }
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return data, used
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generate_workbook(os.path.join(tmp, "records.xlsx"), sheets=1, rows_per_sheet=rows)
+        raw_data, _, err = main.read_excel_full_data(path, None, None)
+        if err:
+            raise SystemExit(err)
+    # 兩種表示法都從快取格式的精簡list重建，共用相同的欄位字串與 sorted_notes，
+    # 量測的是每筆記錄容器本身（dict / 日期物件 / 日期字串 vs __slots__ 與序數）的成本
+    for record in raw_data["sheet1"]:
+        record.sorted_notes  # 先計算內容排序，量測時兩者都不含排序本身的配置
+    packed = main._pack_items(raw_data["sheet1"])
+    raw_data = None
+    count = len(packed)
+
+    legacy, legacy_bytes = measure(lambda: [as_legacy_dict(r) for r in main._unpack_items(packed)])
+    legacy = None
+    records, record_bytes = measure(lambda: main._unpack_items(packed))
+    print(f"{count} 筆記錄")
+    print(f"  dict      : {legacy_bytes / count:8.1f} bytes/筆")
+    print(f"  WorkRecord: {record_bytes / count:8.1f} bytes/筆  （節省 {1 - record_bytes / legacy_bytes:.0%}）")
@@ -0,0 +1,118 @@
+"""
+內容拆分與日期前綴擷取比較：舊版 split_content_to_parts / extract_4digit_number vs 目前版本
+
+以 workbook_gen.make_long_note 產生的附註測試，先確認兩者結果（含 merge_and_smart_sort）完全相同，再比較耗時
+用法：python benchmarks/bench_smart_sort.py [notes]
+"""
+import os
+import random
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main
+from workbook_gen import make_long_note
+
+
+def legacy_extract_4digit_number(text):
+    """重構前的 extract_4digit_number（原樣保留供比較）"""
+    if not text or not isinstance(text, str):
+        return 0
+    full_to_half = str.maketrans('０１２３４５６７８９', '0123456789')
+    text_normalized = text.strip().translate(full_to_half)
+    start_match = re.match(r'^(\d{4})', text_normalized)
+    if start_match:
+        date_num = start_match.group(1)
+        month = int(date_num[:2])
+        day = int(date_num[2:])
+        if 1 <= month <= 12 and 1 <= day <= 31:
+            return int(date_num)
+    standalone_matches = re.findall(r'\b(\d{4})\b', text_normalized)
+    valid_dates = []
+    for num_str in standalone_matches:
+        month = int(num_str[:2])
+        day = int(num_str[2:])
+        if 1 <= month <= 12 and 1 <= day <= 31:
+            valid_dates.append(int(num_str))
+    if valid_dates:
+        return max(valid_dates)
+    return 0
+
+
+def legacy_split_content_to_parts(content):
+    """重構前的 split_content_to_parts（原樣保留供比較）"""
+    if not content or not isinstance(content, str):
+        return []
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    separators = ['\n', '|', ';', '、']
+    parts = [content.strip()]
+    for sep in separators:
+        temp_parts = []
+        for part in parts:
+            temp_parts.extend([p.strip() for p in part.split(sep) if p.strip()])
+        parts = temp_parts
+    return parts
+
+
+EDGE_CASES = ["", None, 1234, " ", "|;、\n", "0230 無效日期", "1301 ", "12345 長數字", "０２０５全形", "abc 0405 與 0512",
+              "a\r\nb\rc", "  x 　| y ", "٠٢٠٥ 阿拉伯數字", "0101|0101|0101"]
+
+
+def make_notes(count, seed=0):
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    return [make_long_note(rng, start + timedelta(days=rng.randrange(365))) for _ in range(count)] + EDGE_CASES
+
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - t0
+
+
+def check_parity(notes):
+    for note in notes:
+        expected = legacy_split_content_to_parts(note)
+        if main.split_content_to_parts(note) != expected:
+            raise SystemExit(f"拆分結果不一致：{note!r}")
+        for part in expected + [note]:
+            if main.extract_4digit_number(part) != legacy_extract_4digit_number(part):
+                raise SystemExit(f"日期擷取結果不一致：{part!r}")
+
+
+def run(count):
+    notes = make_notes(count)
+    check_parity(notes)
+
+    parts = [p for note in notes for p in legacy_split_content_to_parts(note)]
+    _, t_split_old = timed(lambda: [legacy_split_content_to_parts(n) for n in notes])
+    _, t_split_new = timed(lambda: [main.split_content_to_parts(n) for n in notes])
+    _, t_extract_old = timed(lambda: [legacy_extract_4digit_number(p) for p in parts])
+    _, t_extract_new = timed(lambda: [main.extract_4digit_number(p) for p in parts])
+
+    # 整體排序：暫時換回舊函數量測 merge_and_smart_sort
+    rows = list(zip(notes, notes[1:] + notes[:1], notes[2:] + notes[:2]))
+    current, t_merge_new = timed(lambda: [main.merge_and_smart_sort(*r) for r in rows])
+    originals = main.split_content_to_parts, main.extract_4digit_number
+    main.split_content_to_parts, main.extract_4digit_number = legacy_split_content_to_parts, legacy_extract_4digit_number
+    try:
+        legacy, t_merge_old = timed(lambda: [main.merge_and_smart_sort(*r) for r in rows])
+    finally:
+        main.split_content_to_parts, main.extract_4digit_number = originals
+    if legacy != current:
+        raise SystemExit("merge_and_smart_sort 結果不一致")
+
+    print(f"{len(notes)} 則附註、{len(parts)} 個片段：結果一致")
+    for name, old, new in (("split_content_to_parts", t_split_old, t_split_new),
+                           ("extract_4digit_number", t_extract_old, t_extract_new),
+                           ("merge_and_smart_sort", t_merge_old, t_merge_new)):
+        print(f"{name:<24} 舊版 {old:.3f}s  目前 {new:.3f}s  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
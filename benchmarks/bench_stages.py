@@ -0,0 +1,179 @@
+"""
+各階段耗時量測：產生測試檔後依序量測
+開啟檔案 → match_header → 讀取列 → 解析列 → merge_and_smart_sort → 圖表彙總 → savefig → 匯出
+
+結果以 JSON 輸出（含 commit 與參數），可用 --compare 與先前的結果比較
+用法：
+    python benchmarks/bench_stages.py --sheets 4 --rows 5000 --out before.json
+    python benchmarks/bench_stages.py --sheets 4 --rows 5000 --out after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main
+from openpyxl import load_workbook
+from workbook_gen import generate_workbook
+
+
+class StageTimer:
+    """記錄每個階段多次執行中最短的耗時"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, repeat=1):
+        best = None
+        result = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        self.stages[name] = round(best, 6)
+        return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(HERE),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def read_sheet_rows(path):
+    """開啟檔案後逐Sheet取得表頭列與其餘各列（read_only 模式）"""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    sheets = {}
+    for sheet_name in wb.sheetnames:
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        header = None
+        for row in rows:
+            if row and any(main.header_signature(row)):
+                header = main.header_signature(row)
+                if not main.match_header(header)[1]:
+                    break
+        sheets[sheet_name] = (header, list(rows))
+    wb.close()
+    return sheets
+
+
+def run(args):
+    timer = StageTimer()
+    repeat = args.repeat
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        t0 = time.perf_counter()
+        generate_workbook(path, sheets=args.sheets, rows_per_sheet=args.rows, seed=args.seed,
+                          mixed_types=args.mixed, header_aliases=args.aliases, long_notes=args.long_notes,
+                          serials=args.mixed, title_rows=args.title_rows)
+        generate_seconds = time.perf_counter() - t0
+
+        timer.run("open", lambda: load_workbook(path, read_only=True, data_only=True).close(), repeat)
+        sheet_rows = timer.run("read_rows", lambda: read_sheet_rows(path), repeat)
+        headers = [header for header, _ in sheet_rows.values()]
+        col_indexes = timer.run("match_header", lambda: [main.match_header(h)[0] for h in headers], repeat)
+
+        def parse_rows():
+            return {name: list(main.iter_sheet_items(rows, col_index, None, None))
+                    for (name, (_, rows)), col_index in zip(sheet_rows.items(), col_indexes)}
+        raw_data = timer.run("parse_rows", parse_rows, repeat)
+        records = [r for items in raw_data.values() for r in items]
+
+        timer.run("merge_and_smart_sort",
+                  lambda: [main.merge_and_smart_sort(r.title, r.progress, r.note) for r in records], repeat)
+
+        def full_read(engine):
+            main._HEADER_CACHE.clear()
+            return main.read_excel_full_data(path, None, None, engine=engine, workers=1)
+        full = timer.run("read_excel_full_data[openpyxl]", lambda: full_read("openpyxl"), repeat)
+        timer.run("read_excel_full_data[xml]", lambda: full_read("xml"), repeat)
+        raw_data, valid_sheets, err = full
+        if err:
+            raise SystemExit(f"讀取失敗：{err}")
+        # 匯出前先算好排序結果，避免匯出階段包含排序時間
+        for items in raw_data.values():
+            for r in items:
+                r.sorted_notes
+
+        weights = {s: 0.1 * (i + 1) for i, s in enumerate(valid_sheets)}
+        date_labels, layers = timer.run(
+            "chart_aggregate",
+            lambda: main.ChartCube(raw_data, valid_sheets).layers(weights, valid_sheets, bucket="auto"), repeat)
+
+        def savefig():
+            chart = main.StackedBarChart()
+            chart.update(date_labels, valid_sheets, layers)
+            return main.render_chart_png(chart.figure)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            chart_png = timer.run("savefig", savefig, repeat)
+
+        write_only_path = os.path.join(tmp, "write_only.xlsx")
+        legacy_path = os.path.join(tmp, "legacy.xlsx")
+        for engine, out in (("write_only", write_only_path), ("legacy", legacy_path)):
+            timer.run(f"export[{engine}]", lambda: main.write_report_excel(
+                out, raw_data, valid_sheets, "2020-01-01", "2030-12-31", chart_png, engine=engine), repeat)
+        timer.run("format_excel_cells", lambda: main.format_excel_cells(legacy_path), repeat)
+
+    return {
+        "meta": {"commit": git_commit(), "time": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform()},
+        "params": {"sheets": args.sheets, "rows_per_sheet": args.rows, "seed": args.seed, "mixed": args.mixed,
+                   "aliases": args.aliases, "long_notes": args.long_notes, "title_rows": args.title_rows,
+                   "repeat": repeat},
+        "counts": {"records": len(records), "chart_buckets": len(date_labels),
+                   "generate_seconds": round(generate_seconds, 3)},
+        "stages": timer.stages,
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"commit {result['meta']['commit'] or '-'}，{result['counts']['records']} 筆記錄")
+    for name, seconds in result["stages"].items():
+        line = f"{name:<32} {seconds:9.3f}s"
+        if baseline and name in baseline["stages"] and seconds > 0:
+            old = baseline["stages"][name]
+            line += f"   基準 {old:9.3f}s  ({old / seconds:.2f}x)"
+        print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="工時記錄工具各階段效能量測")
+    parser.add_argument("--sheets", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=2000, help="每個Sheet的列數")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="每個階段執行次數（取最短）")
+    parser.add_argument("--title-rows", type=int, default=1, help="表頭上方的標題列數")
+    parser.add_argument("--no-mixed", dest="mixed", action="store_false", help="日期欄只用 YYYY-MM-DD 字串")
+    parser.add_argument("--no-aliases", dest="aliases", action="store_false", help="表頭不使用別名")
+    parser.add_argument("--short-notes", dest="long_notes", action="store_false", help="使用短附註")
+    parser.add_argument("--out", help="結果JSON輸出路徑")
+    parser.add_argument("--compare", help="與先前的結果JSON比較")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"已寫入 {args.out}")
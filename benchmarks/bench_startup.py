@@ -0,0 +1,53 @@
+"""
+啟動時間量測：在新的子程序中 import main（不含 openpyxl / numpy / matplotlib），
+有圖形環境時另外執行 main.py --measure-startup 量測到第一個可操作視窗的時間
+
+用法：python benchmarks/bench_startup.py [次數]
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = (
+    "import time; t = time.perf_counter(); import main; elapsed = time.perf_counter() - t; "
+    "heavy = [m for m in ('openpyxl', 'numpy', 'matplotlib') if m in __import__('sys').modules]; "
+    "print(elapsed, ','.join(heavy))"
+)
+
+
+def measure_import():
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+
+def measure_window():
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, "main.py", "--measure-startup"], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:]
+    lines = [line for line in result.stdout.splitlines() if line.startswith("啟動時間")]
+    return time.perf_counter() - t0, lines
+
+
+def run(repeat):
+    imports = [measure_import() for _ in range(repeat)]
+    best = min(seconds for seconds, _ in imports)
+    heavy = imports[-1][1]
+    print(f"import main：最短 {best * 1000:.0f} ms（{repeat} 次）；"
+          f"已載入的重量級模組：{heavy or '無'}")
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        wall, lines = measure_window()
+        if wall is None:
+            print(f"無法開啟視窗：{lines}")
+        else:
+            print(f"main.py --measure-startup：程序總時間 {wall * 1000:.0f} ms；{' '.join(lines)}")
+    else:
+        print("沒有圖形環境（DISPLAY），略過視窗量測")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,70 @@
+"""
+read_excel_full_data 峰值記憶體量測：舊版 list(ws.iter_rows()) vs 串流管線
+
+用法：python benchmarks/bench_stream_memory.py [rows]
+每種模式在獨立子程序執行，以 ru_maxrss 取得峰值RSS（僅限 Unix）
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import date
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+
+def run_legacy(path, start_date, end_date):
+    """基準：先將整張Sheet複製為list再篩選（重構前的做法）"""
+    from openpyxl import load_workbook
+    import main
+    raw_data = {}
+    wb = load_workbook(path, read_only=True, data_only=True)
+    for sheet_name in wb.sheetnames:
+        rows = list(wb[sheet_name].iter_rows(values_only=True))
+        col_index, missing = main.match_header(rows[0])
+        if missing:
+            continue
+        items = list(main.iter_sheet_items(rows[1:], col_index, start_date, end_date))
+        if items:
+            raw_data[sheet_name] = items
+    wb.close()
+    return raw_data
+
+
+def run_stream(path, start_date, end_date):
+    import main
+    raw_data, _, _ = main.read_excel_full_data(path, start_date, end_date)
+    return raw_data
+
+
+def child(mode, path):
+    # 僅取一週資料，讓峰值記憶體反映讀取過程而非結果大小
+    start_date, end_date = date(2020, 1, 1), date(2020, 1, 7)
+    runner = run_legacy if mode == "legacy" else run_stream
+    raw_data = runner(path, start_date, end_date)
+    count = sum(len(v) for v in (raw_data or {}).values())
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode}\t{count}\t{peak_kb}")
+
+
+def main_bench(rows):
+    from workbook_gen import generate_workbook
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        print(f"產生 {rows} 列測試檔...")
+        generate_workbook(path, sheets=1, rows_per_sheet=rows)
+        for mode in ("legacy", "stream"):
+            out = subprocess.run([sys.executable, __file__, "--child", mode, path],
+                                 capture_output=True, text=True, check=True).stdout.strip()
+            _, count, peak_kb = out.split("\t")
+            print(f"{mode:>7}: 峰值RSS {int(peak_kb) / 1024:8.1f} MB（區間內 {count} 筆）")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main_bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,100 @@
+"""
+測試用工時記錄Excel產生器（供效能量測使用）
+"""
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import HEADER_MAPPING
+
+HEADER_FIELDS = ["更新進度", "狀態", "作業名稱", "目前進度", "附註描述"]
+
+STATUS_CHOICES = ["處理中", "已完成", "待確認", "進行中", "暫停"]
+TITLE_CHOICES = ["用戶需求開發", "服務器維護", "文檔整理", "案例-問題定位", "新功能驗收"]
+
+
+def make_note(rng, day):
+    mmdd = day.strftime("%m%d")
+    return f"{mmdd}完成初步分析|{mmdd}編寫接口文檔；測試通過、待確認"
+
+
+NOTE_PHRASES = ["完成初步分析", "編寫接口文檔", "測試通過", "待確認", "與客戶開會討論需求", "修正登入逾時問題",
+                "更新部署腳本", "code review", "等待廠商回覆 ticket 4021", "整理 Q3 報表"]
+NOTE_SEPARATORS = ["\n", "\r\n", "|", ";", "、", " | ", "\n\n"]
+
+
+def make_long_note(rng, day, fragments=8):
+    """較接近實際的長附註：多種分隔字元、日期前綴（含全形數字）、重複片段與無日期片段"""
+    parts = []
+    for i in range(rng.randint(1, fragments)):
+        d = day - timedelta(days=rng.randrange(10))
+        prefix = rng.choice([d.strftime("%m%d"), d.strftime("%m%d").translate(str.maketrans("0123456789", "０１２３４５６７８９")),
+                             "", f"({d.strftime('%m%d')})", "  "])
+        parts.append(f"{prefix}{rng.choice(NOTE_PHRASES)}")
+        parts.append(rng.choice(NOTE_SEPARATORS))
+    return "".join(parts)
+
+
+def date_cell(rng, day, mixed_types, serials=False):
+    if not mixed_types:
+        return day.strftime("%Y-%m-%d")
+    choice = rng.random()
+    if serials and choice < 0.1:
+        return (day - date(1899, 12, 30)).days
+    if choice < 0.4:
+        return datetime(day.year, day.month, day.day)
+    if choice < 0.6:
+        return day.strftime("%Y/%m/%d")
+    if choice < 0.7:
+        return day.strftime("%Y-%m-%d 08:30")
+    return day.strftime("%Y-%m-%d")
+
+
+def header_row(rng, header_aliases):
+    """表頭：header_aliases=True 時每欄隨機使用 HEADER_MAPPING 中的別名，欄位順序也打亂"""
+    if not header_aliases:
+        return HEADER_FIELDS, list(HEADER_FIELDS)
+    fields = list(HEADER_FIELDS)
+    rng.shuffle(fields)
+    return fields, [rng.choice(HEADER_MAPPING[field]) for field in fields]
+
+
+def generate_workbook(path, sheets=4, rows_per_sheet=1000, start=date(2020, 1, 1), seed=0, mixed_types=False,
+                      header_aliases=False, long_notes=False, serials=False, title_rows=0):
+    """
+    以write_only模式產生多Sheet工時記錄檔，日期由start逐列遞增
+    mixed_types=True 時日期欄混用 datetime 儲存格與多種字串格式，狀態欄混入數字
+    header_aliases=True 時表頭使用 HEADER_MAPPING 的別名並打亂欄位順序
+    long_notes=True 時進度/附註為多分隔字元的長內容（make_long_note）
+    serials=True 時（需 mixed_types）日期欄混入 Excel 日期序號
+    title_rows 為表頭上方的標題列數（測試表頭偵測）
+    """
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    note = make_long_note if long_notes else make_note
+    for s in range(sheets):
+        ws = wb.create_sheet(f"sheet{s + 1}")
+        for t in range(title_rows):
+            ws.append([f"工作記錄 sheet{s + 1}" if t == 0 else None])
+        fields, header = header_row(rng, header_aliases)
+        ws.append(header)
+        for r in range(rows_per_sheet):
+            day = start + timedelta(days=r // 20)
+            status = rng.choice(STATUS_CHOICES)
+            if mixed_types and rng.random() < 0.1:
+                status = rng.choice([1234, 12.5, True, None])
+            values = {
+                "更新進度": date_cell(rng, day, mixed_types, serials),
+                "狀態": status,
+                "作業名稱": rng.choice(TITLE_CHOICES),
+                "目前進度": note(rng, day),
+                "附註描述": note(rng, day + timedelta(days=1)),
+            }
+            ws.append([values[field] for field in fields])
+    wb.save(path)
+    return path
@@ -1,16 +1,53 @@
+import time
+# 啟動計時起點（量測到第一個可操作視窗的時間）
+STARTUP_T0 = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import openpyxl
-from openpyxl import load_workbook
-from openpyxl.drawing.image import Image as ExcelImage
-from openpyxl.styles import Alignment, Font, PatternFill
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 import os
 import re
 import json
+import csv
+import hashlib
+import sqlite3
+import zlib
 import io
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import importlib
+import copy
+import itertools
+import functools
+import contextlib
+import cProfile
+import configparser
+import argparse
+import sys
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import zipfile
+import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+
+class _LazyModule:
+    """第一次存取屬性時才 import 的模組（openpyxl / numpy / matplotlib 載入較慢，延後到實際使用時）"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+openpyxl = _LazyModule("openpyxl")
+_xl_styles = _LazyModule("openpyxl.styles")
+_xl_cell = _LazyModule("openpyxl.cell")
+_xl_utils = _LazyModule("openpyxl.utils")
+_xl_image = _LazyModule("openpyxl.drawing.image")
+np = _LazyModule("numpy")
+matplotlib = _LazyModule("matplotlib")
 
 # ==========================================
 # 全域設定區
@@ -18,6 +55,16 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 WINDOW_SIZE = "900x700"
 FONT_NAME = "Microsoft JhengHei"
 WEIGHT_CONFIG_FILE = "sheet_weight_config.json"
+# 批次/命令列模式的預設設定（檔案、日期區間、輸出資料夾與輸出項目）
+APP_SETTINGS_FILE = "work_log_config.ini"
+# 歷史資料庫：勾選後讀取的記錄寫入此 SQLite，之後同一檔案的日期區間、圖表與匯出直接查詢資料庫
+HISTORY_DB_FILE = os.path.join(os.path.dirname(WEIGHT_CONFIG_FILE), "work_history.db")
+# 每次讀取/圖表/匯出的各階段耗時與計數（JSON Lines，一行一次）與 cProfile 輸出資料夾
+RUN_LOG_FILE = os.path.join(os.path.dirname(WEIGHT_CONFIG_FILE), "run_stats.jsonl")
+PROFILE_DIR = os.path.join(os.path.dirname(WEIGHT_CONFIG_FILE), "profiles")
+# 解析結果快取（與加權配置文件放在同一位置），超過容量上限時淘汰最久未使用的檔案
+PARSE_CACHE_FILE = os.path.join(os.path.dirname(WEIGHT_CONFIG_FILE), "parse_cache.db")
+PARSE_CACHE_MAX_BYTES = 200 * 1024 * 1024
 # 圖標路徑配置（確保 my_icon.png 和程式在同一資料夾）
 ICON_PATH = "my_icon.png"
 HEADER_MAPPING = {
@@ -27,6 +74,40 @@ HEADER_MAPPING = {
     "目前進度": ["目前進度", "進度說明", "進度", "progress"],
     "附註描述": ["附註描述", "附註", "備註", "描述", "說明", "note", "remark"]
 }
+# 表頭偵測最多讀取的列數（表頭不在第1列時，例如上方有標題列）
+HEADER_PROBE_ROWS = 5
+# 平行解析的子程序數量（1 表示在主程序逐一解析Sheet）
+PARSE_WORKERS = 1
+# 日期字串/序號轉換結果的LRU快取筆數
+DATE_CACHE_SIZE = 4096
+# 內容排序結果的LRU快取筆數（相同的作業名稱/進度/附註只排序一次）
+SORTED_NOTES_CACHE_SIZE = 65536
+# 圖表自動彙總：資料跨度（天）不超過第一個值按日、不超過第二個值按週，其餘按月
+CHART_BUCKET_DAY_MAX_DAYS = 45
+CHART_BUCKET_WEEK_MAX_DAYS = 180
+CHART_BUCKET_CHOICES = {"自動": "auto", "日": "day", "週": "week", "月": "month"}
+# 圖表最多顯示的X軸標籤數，超過時間隔顯示並省略總計標籤
+CHART_MAX_LABELS = 40
+# 匯出用圖表PNG快取筆數（依資料、加權、日期區間）
+CHART_PNG_CACHE_SIZE = 8
+# 讀取/匯出時每處理多少列回報一次進度並檢查是否取消
+PROGRESS_ROW_STEP = 500
+# 啟動時間目標（毫秒，僅用於啟動時的提示訊息）
+STARTUP_TARGET_MS = 300
+# 背景工作進度的輪詢間隔（毫秒）
+JOB_POLL_MS = 100
+# 資料夾模式下檢查檔案變更（大小/修改時間）的輪詢間隔（毫秒）
+FOLDER_POLL_MS = 3000
+# 資料夾模式合併Sheet名稱時，檔名與Sheet名稱之間的分隔字元
+FOLDER_SHEET_SEPARATOR = "/"
+# 批次模式的子程序數量（None 表示使用CPU核心數）
+BATCH_WORKERS = None
+# 匯出引擎："write_only"（單次寫入，樣式於寫入時套用），或 "legacy"（寫入後再以 format_excel_cells 重新格式化）
+EXPORT_ENGINE = "write_only"
+# 明細匯出（CSV/JSONL/Parquet）每批寫出的筆數
+RECORD_EXPORT_CHUNK_ROWS = 5000
+# 讀取引擎："openpyxl"，或 "xml"（直接串流 xlsx 的 zip/XML，只解碼需要的欄位，適合大型檔案）
+READER_ENGINE = "openpyxl"
 
 # ==========================================
 # 核心工具函數
@@ -47,67 +128,81 @@ def save_weight_config(config):
     except:
         pass
 
-def format_date_value(value):
-    if value is None:
-        return ""
+def clamp_weight(value, default=0.1):
+    """圖表使用的加權值：非數字或負數時改為預設值（介面與批次模式共用）"""
+    try:
+        weight = float(value)
+    except (TypeError, ValueError):
+        return default
+    return weight if weight >= 0 else default
+
+# 日期字串：YYYY-MM-DD 或 YYYY/MM/DD，後面可接空白或T開頭的時間
+_DATE_TEXT_RE = re.compile(r"(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[ T]|$)")
+# Excel 日期序號上限（9999-12-31）
+EXCEL_SERIAL_MAX = 2958465
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_text(text):
+    match = _DATE_TEXT_RE.match(text.strip())
+    if match is None:
+        return None
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _serial_to_date(value):
+    result = excel_serial_to_datetime(value)
+    return result.date() if isinstance(result, datetime) else None
+
+def normalize_date(value):
+    """
+    將儲存格的日期值轉為 date，無法辨識時回傳 None
+    datetime / date 直接轉換；int / float 視為 Excel 日期序號（1900 日期系統）；
+    字串支援 2026-02-01、2026/2/1 及後接時間的格式，相同字串只解析一次
+    """
+    cls = type(value)
+    if cls is str:
+        return _parse_date_text(value)
+    if cls is datetime:
+        return value.date()
+    if cls is date:
+        return value
+    if cls is int or cls is float:
+        return _serial_to_date(value) if 1 <= value <= EXCEL_SERIAL_MAX else None
     if isinstance(value, datetime):
-        return value.strftime("%Y-%m-%d")
-    if isinstance(value, str):
-        value_str = value.strip()
-        if "/" in value_str:
-            try:
-                date_parts = value_str.split(" ")[0].split("/")
-                year = int(date_parts[0])
-                month = int(date_parts[1])
-                day = int(date_parts[2])
-                return datetime(year, month, day).strftime("%Y-%m-%d")
-            except:
-                pass
-        if " " in value_str or "T" in value_str:
-            date_part = value_str.split(" ")[0]
-            try:
-                datetime.strptime(date_part, "%Y-%m-%d")
-                return date_part
-            except ValueError:
-                pass
-        return value_str
-    return str(value)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+# \d 同時比對半形與全形數字，int() 也能直接轉換全形數字，不需先轉成半形
+_LEADING_4DIGIT_RE = re.compile(r'\s*(\d{4})')
+_STANDALONE_4DIGIT_RE = re.compile(r'\b(\d{4})\b')
+# 所有內容分隔字元（\r 與 \r\n 視同換行）一次切開
+_CONTENT_SEPARATOR_RE = re.compile(r'[\r\n|;、]')
+
+def _is_mmdd(num_str):
+    month, day = divmod(int(num_str), 100)
+    return 1 <= month <= 12 and 1 <= day <= 31
 
 def extract_4digit_number(text):
     if not text or not isinstance(text, str):
         return 0
-    full_to_half = str.maketrans('０１２３４５６７８９', '0123456789')
-    text_normalized = text.strip().translate(full_to_half)
-    start_match = re.match(r'^(\d{4})', text_normalized)
-    if start_match:
-        date_num = start_match.group(1)
-        month = int(date_num[:2])
-        day = int(date_num[2:])
-        if 1 <= month <= 12 and 1 <= day <= 31:
-            return int(date_num)
-    standalone_matches = re.findall(r'\b(\d{4})\b', text_normalized)
-    valid_dates = []
-    for num_str in standalone_matches:
-        month = int(num_str[:2])
-        day = int(num_str[2:])
-        if 1 <= month <= 12 and 1 <= day <= 31:
-            valid_dates.append(int(num_str))
-    if valid_dates:
-        return max(valid_dates)
-    return 0
+    start_match = _LEADING_4DIGIT_RE.match(text)
+    if start_match and _is_mmdd(start_match.group(1)):
+        return int(start_match.group(1))
+    best = 0
+    for num_str in _STANDALONE_4DIGIT_RE.findall(text):
+        if _is_mmdd(num_str):
+            best = max(best, int(num_str))
+    return best
 
 def split_content_to_parts(content):
     if not content or not isinstance(content, str):
         return []
-    content = content.replace('\r\n', '\n').replace('\r', '\n')
-    separators = ['\n', '|', ';', '、']
-    parts = [content.strip()]
-    for sep in separators:
-        temp_parts = []
-        for part in parts:
-            temp_parts.extend([p.strip() for p in part.split(sep) if p.strip()])
-        parts = temp_parts
-    return parts
+    return [part for part in map(str.strip, _CONTENT_SEPARATOR_RE.split(content)) if part]
 
 def merge_and_smart_sort(title, progress, note):
     grouped_data = {}
@@ -175,77 +270,1310 @@ def match_header(header_row):
                 break
     return col_index, [f for f in HEADER_MAPPING.keys() if f not in col_index]
 
-def read_excel_full_data(file_path, start_date, end_date):
-    if not os.path.exists(file_path) or not file_path.lower().endswith('.xlsx'):
-        return None, None, "檔案錯誤"
-    
-    raw_data = {}
-    valid_sheets = []
+class OperationCancelled(Exception):
+    """背景讀取/匯出被使用者取消"""
+
+CANCELLED_MSG = "已取消"
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled()
+
+# ==========================================
+# 執行統計（各階段耗時、計數，結構化記錄檔與 cProfile）
+# ==========================================
+# 計數項目的顯示名稱（未列出的直接顯示鍵值）
+STAT_LABELS = {
+    "sheets_total": "Sheet數", "sheets_skipped": "略過Sheet", "rows_read": "讀取列數", "records": "有效記錄",
+    "rows_skipped": "略過列數", "header_cache_hits": "表頭快取命中", "parse_cache_hits": "解析快取命中",
+    "parse_cache_misses": "解析快取未命中", "incremental_sheets": "增量解析Sheet",
+    "sort_cache_hits": "排序快取命中", "sort_cache_misses": "排序快取未命中",
+    "chart_png_ready": "圖表PNG已就緒", "chart_buckets": "圖表長條數", "exported_rows": "匯出筆數",
+    "store_rows_written": "寫入資料庫筆數",
+}
 
+class RunStats:
+    """
+    一次執行（讀取/更新圖表/匯出）的統計：各階段累計秒數與計數
+    以 activate() 設為目前執行緒的統計後，各函數透過 active_stats() 記錄，不需逐層傳遞
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.elapsed = 0.0
+        self.stages = {}
+        self.counters = {}
+        self.error = None
+        self.profile_path = None
+        self._t0 = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, payload):
+        """併入子程序回傳的統計（to_dict 的 stages / counters）"""
+        for name, seconds in payload.get("stages", {}).items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, n in payload.get("counters", {}).items():
+            self.count(name, n)
+
+    @contextlib.contextmanager
+    def activate(self):
+        previous = getattr(_ACTIVE_STATS, "stats", None)
+        _ACTIVE_STATS.stats = self
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            _ACTIVE_STATS.stats = previous
+            self.elapsed = time.perf_counter() - self._t0
+
+    def rows_per_second(self):
+        seconds = self.stages.get("讀取與解析列", 0.0)
+        rows = self.counters.get("rows_read", 0)
+        return rows / seconds if seconds > 0 and rows else 0.0
+
+    def to_dict(self):
+        counters = dict(self.counters)
+        if "rows_read" in counters:
+            counters["rows_skipped"] = counters["rows_read"] - counters.get("records", 0)
+        return {
+            "name": self.name,
+            "time": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "elapsed": round(self.elapsed, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "counters": counters,
+            "rows_per_second": round(self.rows_per_second(), 1),
+            "error": self.error,
+            "profile": self.profile_path,
+        }
+
+    def summary_lines(self):
+        data = self.to_dict()
+        lines = [f"{data['name']}　{data['time']}　共 {data['elapsed']:.2f} 秒" + (f"（{data['error']}）" if data["error"] else "")]
+        if data["stages"]:
+            lines.append("　".join(f"{name} {seconds:.2f}s" for name, seconds in data["stages"].items()))
+        if data["counters"]:
+            lines.append("　".join(f"{STAT_LABELS.get(name, name)} {n}" for name, n in data["counters"].items()))
+        if data["rows_per_second"]:
+            lines.append(f"解析速度 {data['rows_per_second']:.0f} 列/秒")
+        if data["profile"]:
+            lines.append(f"cProfile：{data['profile']}")
+        return lines
+
+class _NullStats(RunStats):
+    """沒有啟用統計時使用，所有記錄都忽略"""
+
+    def __init__(self):
+        super().__init__("")
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        yield
+
+    def count(self, name, n=1):
+        pass
+
+    def merge(self, payload):
+        pass
+
+_ACTIVE_STATS = threading.local()
+_NULL_STATS = _NullStats()
+
+def active_stats():
+    """目前執行緒啟用中的 RunStats；未啟用時回傳不記錄的空物件"""
+    return getattr(_ACTIVE_STATS, "stats", None) or _NULL_STATS
+
+def append_run_log(stats):
+    """將統計以一行 JSON 附加到 RUN_LOG_FILE"""
     try:
-        wb = load_workbook(file_path, read_only=True, data_only=True)
-        for sheet_name in wb.sheetnames:
-            try:
-                ws = wb[sheet_name]
-                rows = list(ws.iter_rows(values_only=True))
-                if len(rows) < 2:
+        with open(RUN_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(stats.to_dict(), ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"統計記錄寫入失敗：{e}")
+
+def run_profiled(func, name):
+    """以 cProfile 執行 func()，結果存到 PROFILE_DIR；回傳 (func 的結果, .prof 路徑)"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}_{datetime.now():%Y%m%d_%H%M%S}.prof")
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func), path
+    finally:
+        profiler.dump_stats(path)
+
+def _watch_rows(rows, sheet_name, progress, cancel_event):
+    """每 PROGRESS_ROW_STEP 列回報一次進度並檢查取消"""
+    for count, row in enumerate(rows, 1):
+        if count % PROGRESS_ROW_STEP == 0:
+            check_cancelled(cancel_event)
+            if progress:
+                progress(None, None, f"{sheet_name}：已讀取 {count} 列")
+        yield row
+
+# 表頭快取：(檔案路徑, Sheet名稱) -> (表頭簽名, 欄位索引)
+_HEADER_CACHE = {}
+
+def header_signature(header_row):
+    return tuple(str(h).strip() if h is not None else "" for h in header_row)
+
+def detect_header(file_path, sheet_name, rows):
+    """
+    只讀取前 HEADER_PROBE_ROWS 列尋找表頭，不讀取Sheet內容
+    表頭簽名與快取相同時直接沿用欄位索引，略過 match_header
+    找到表頭時回傳欄位索引（rows 停在表頭下一列），否則回傳 None
+    """
+    cache_key = (os.path.abspath(file_path), sheet_name)
+    cached = _HEADER_CACHE.get(cache_key)
+    for row in itertools.islice(rows, HEADER_PROBE_ROWS):
+        if not row:
+            continue
+        signature = header_signature(row)
+        if not any(signature):
+            continue
+        if cached and cached[0] == signature:
+            active_stats().count("header_cache_hits")
+            return cached[1]
+        col_index, missing = match_header(signature)
+        if not missing:
+            _HEADER_CACHE[cache_key] = (signature, col_index)
+            return col_index
+    return None
+
+def _cell_text(row, idx):
+    return str(row[idx]).strip() if len(row) > idx and row[idx] is not None else ""
+
+@functools.lru_cache(maxsize=SORTED_NOTES_CACHE_SIZE)
+def cached_smart_sort(title, progress, note):
+    """merge_and_smart_sort 的記憶化版本；回傳 tuple，供多筆記錄共用"""
+    return tuple(merge_and_smart_sort(title, progress, note))
+
+class WorkRecord:
+    """
+    單筆工作記錄：以 __slots__ 取代每列一個字串鍵 dict，日期只存序數（不另存日期物件與字串），
+    重複出現的狀態/作業名稱字串會被 intern 共用
+    sorted_notes 在第一次使用時（匯出）才計算，讀取時只需解析日期
+    """
+    __slots__ = ("ordinal", "status", "title", "progress", "note", "_sorted_notes")
+
+    def __init__(self, ordinal, status, title, progress, note, sorted_notes=None):
+        self.ordinal = ordinal
+        self.status = sys.intern(status)
+        self.title = sys.intern(title)
+        self.progress = progress
+        self.note = note
+        self._sorted_notes = tuple(sorted_notes) if sorted_notes is not None else None
+
+    @property
+    def sorted_notes(self):
+        if self._sorted_notes is None:
+            self._sorted_notes = cached_smart_sort(self.title, self.progress, self.note)
+        return self._sorted_notes
+
+    def notes_uncached(self):
+        """與 sorted_notes 相同，但尚未計算時只經由LRU快取取得、不存回記錄（串流匯出大量記錄時記憶體不增加）"""
+        if self._sorted_notes is not None:
+            return self._sorted_notes
+        return cached_smart_sort(self.title, self.progress, self.note)
+
+    @property
+    def date(self):
+        return date.fromordinal(self.ordinal)
+
+    @property
+    def date_text(self):
+        return self.date.isoformat()
+
+    def astuple(self):
+        """原始欄位（sorted_notes 可由這些欄位推得，不列入）"""
+        return (self.ordinal, self.status, self.title, self.progress, self.note)
+
+    def pack(self):
+        """astuple() 加上已計算的 sorted_notes（未計算時為 None），可用 WorkRecord(*packed) 還原"""
+        return self.astuple() + (self._sorted_notes,)
+
+    def __eq__(self, other):
+        return isinstance(other, WorkRecord) and self.astuple() == other.astuple()
+
+    def __repr__(self):
+        return f"WorkRecord({self.date_text}, {self.status!r}, {self.title!r})"
+
+def iter_sheet_items(rows, col_index, start_date, end_date):
+    """
+    逐列串流處理：日期解析 → 區間篩選 → 建立 WorkRecord
+    rows 可為任意列迭代器（例如 ws.iter_rows），不會一次複製整張Sheet
+    start_date / end_date 為 None 時不限制該端
+    """
+    date_idx = col_index["更新進度"]
+    rows_read = 0
+    records = 0
+    for row in rows:
+        rows_read += 1
+        if not row or len(row) <= date_idx:
+            continue
+        record_date = normalize_date(row[date_idx])
+        if record_date is None:
+            continue
+        if (start_date and record_date < start_date) or (end_date and record_date > end_date):
+            continue
+
+        records += 1
+        yield WorkRecord(record_date.toordinal(),
+                         _cell_text(row, col_index["狀態"]),
+                         _cell_text(row, col_index["作業名稱"]),
+                         _cell_text(row, col_index["目前進度"]),
+                         _cell_text(row, col_index["附註描述"]))
+    stats = active_stats()
+    stats.count("rows_read", rows_read)
+    stats.count("records", records)
+
+# ==========================================
+# 讀取引擎（openpyxl / 直接串流 zip/XML）
+# ==========================================
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW_TAG = _MAIN_NS + "row"
+_CELL_TAG = _MAIN_NS + "c"
+_VALUE_TAG = _MAIN_NS + "v"
+_TEXT_TAG = _MAIN_NS + "t"
+_RUN_TAG = _MAIN_NS + "r"
+_INLINE_TAG = _MAIN_NS + "is"
+# 內建數值格式中的日期與時間長度格式（ECMA-376 18.8.30）
+_BUILTIN_DATE_FORMATS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 47}
+_BUILTIN_TIMEDELTA_FORMATS = {46}
+_DATE_FORMAT_STRIP_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_DATE_FORMAT_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_TIMEDELTA_FORMAT_RE = re.compile(r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.I)
+_WINDOWS_EPOCH = datetime(1899, 12, 30)
+_MAC_EPOCH = datetime(1904, 1, 1)
+
+def excel_serial_to_datetime(value, date1904=False):
+    """Excel 日期序號轉 datetime（規則同 openpyxl：含1900閏年錯誤，小於1的值視為時間）"""
+    epoch = _MAC_EPOCH if date1904 else _WINDOWS_EPOCH
+    day, fraction = divmod(value, 1)
+    diff = timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        return (datetime.min + diff).time()
+    if 0 < value < 60 and not date1904:
+        day += 1
+    return epoch + timedelta(days=day) + diff
+
+def _xml_text(element):
+    """字串節點的純文字（<t> 或多段 <r><t>，略過注音 rPh）"""
+    text = element.findtext(_TEXT_TAG)
+    if text is not None:
+        return text
+    return "".join(run.findtext(_TEXT_TAG) or "" for run in element.iter(_RUN_TAG))
+
+def _column_index(cell_ref):
+    n = 0
+    for ch in cell_ref:
+        if "A" <= ch <= "Z":
+            n = n * 26 + ord(ch) - 64
+        else:
+            break
+    return n - 1
+
+def _read_workbook_xml(archive):
+    """讀取 workbook.xml：回傳 (Sheet名稱順序, 工作表XML路徑, 是否為1904日期系統)"""
+    rels = {}
+    rels_root = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels_root.iter(_PKG_REL_NS + "Relationship"):
+        target = rel.get("Target", "")
+        target = target.lstrip("/") if target.startswith("/") else "xl/" + target
+        rels[rel.get("Id")] = (rel.get("Type", ""), target)
+    wb_root = ET.fromstring(archive.read("xl/workbook.xml"))
+    date1904 = False
+    pr = wb_root.find(_MAIN_NS + "workbookPr")
+    if pr is not None:
+        date1904 = pr.get("date1904", "0").lower() in ("1", "true")
+    sheetnames = []
+    sheet_paths = {}
+    for sheet in wb_root.iter(_MAIN_NS + "sheet"):
+        rel_type, target = rels.get(sheet.get(_REL_ID), ("", ""))
+        sheetnames.append(sheet.get("name"))
+        if rel_type.endswith("/worksheet"):
+            sheet_paths[sheet.get("name")] = target
+    return sheetnames, sheet_paths, date1904
+
+def read_sheet_names(file_path):
+    """只讀取 workbook.xml 取得Sheet順序（與 openpyxl 的 wb.sheetnames 相同），不載入共用字串"""
+    with zipfile.ZipFile(file_path) as archive:
+        return _read_workbook_xml(archive)[0]
+
+class _OpenpyxlReader:
+    def __init__(self, file_path):
+        self._wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        self.sheetnames = self._wb.sheetnames
+
+    def iter_rows(self, sheet_name):
+        return self._wb[sheet_name].iter_rows(values_only=True)
+
+    def select_columns(self, rows, columns):
+        pass
+
+    def close(self):
+        self._wb.close()
+
+class _FastSheetRows:
+    """以 iterparse 逐列串流工作表XML；設定 columns 後只解碼這些欄位"""
+
+    def __init__(self, reader, path):
+        self._reader = reader
+        self._path = path
+        self.columns = None
+        self._rows = self._iter_rows()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._rows)
+
+    def _iter_rows(self):
+        expected = 1
+        with self._reader._zip.open(self._path) as src:
+            sheet_data = None
+            for event, elem in ET.iterparse(src, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == _MAIN_NS + "sheetData":
+                        sheet_data = elem
                     continue
-                col_index, missing = match_header(rows[0])
-                if missing:
+                if elem.tag != _ROW_TAG:
                     continue
-                valid_sheets.append(sheet_name)
-                sheet_items = []
-                for row in rows[1:]:
-                    if not row or len(row) <= col_index["更新進度"]:
-                        continue
-                    date_val = row[col_index["更新進度"]]
-                    date_str = format_date_value(date_val)
-                    try:
-                        record_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    except:
-                        continue
-                    if not (start_date <= record_date <= end_date):
-                        continue
-                    
-                    item = {
-                        "更新日期": date_str,
-                        "原始日期物件": record_date,
-                        "狀態": str(row[col_index["狀態"]]).strip() if len(row) > col_index["狀態"] and row[col_index["狀態"]] is not None else "",
-                        "作業名稱": str(row[col_index["作業名稱"]]).strip() if len(row) > col_index["作業名稱"] and row[col_index["作業名稱"]] is not None else "",
-                        "目前進度": str(row[col_index["目前進度"]]).strip() if len(row) > col_index["目前進度"] and row[col_index["目前進度"]] is not None else "",
-                        "附註描述": str(row[col_index["附註描述"]]).strip() if len(row) > col_index["附註描述"] and row[col_index["附註描述"]] is not None else "",
-                    }
-                    item["sorted_notes"] = merge_and_smart_sort(item["作業名稱"], item["目前進度"], item["附註描述"])
-                    sheet_items.append(item)
-                
-                if sheet_items:
-                    raw_data[sheet_name] = sheet_items
+                row_ref = elem.get("r")
+                idx = int(row_ref) if row_ref else expected
+                while expected < idx:
+                    expected += 1
+                    yield ()
+                expected = idx + 1
+                row = self._decode_row(elem)
+                if sheet_data is not None:
+                    sheet_data.clear()
+                yield row
+
+    def _decode_row(self, row_elem):
+        columns = self.columns
+        values = []
+        col = -1
+        for cell in row_elem.iter(_CELL_TAG):
+            ref = cell.get("r")
+            col = _column_index(ref) if ref else col + 1
+            if columns is not None and col not in columns:
+                continue
+            if col >= len(values):
+                values.extend([None] * (col + 1 - len(values)))
+            values[col] = self._reader.decode_cell(cell)
+        return tuple(values)
+
+class FastXlsxReader:
+    """
+    直接開啟 xlsx 的 zip，串流 sharedStrings 與各工作表XML，不經過 openpyxl
+    數值、共用字串、布林、行內字串與日期序號的轉換規則與 openpyxl（data_only）一致
+    """
+
+    def __init__(self, file_path):
+        self._zip = zipfile.ZipFile(file_path)
+        try:
+            self._load_workbook()
+            self._shared_strings = self._load_shared_strings()
+            self._date_styles, self._timedelta_styles = self._load_styles()
+        except Exception:
+            self._zip.close()
+            raise
+
+    def _load_workbook(self):
+        self.sheetnames, self._sheet_paths, self.date1904 = _read_workbook_xml(self._zip)
+
+    def _load_shared_strings(self):
+        if "xl/sharedStrings.xml" not in self._zip.namelist():
+            return []
+        strings = []
+        with self._zip.open("xl/sharedStrings.xml") as src:
+            for event, elem in ET.iterparse(src):
+                if elem.tag == _MAIN_NS + "si":
+                    strings.append(_xml_text(elem))
+                    elem.clear()
+        return strings
+
+    def _load_styles(self):
+        if "xl/styles.xml" not in self._zip.namelist():
+            return set(), set()
+        root = ET.fromstring(self._zip.read("xl/styles.xml"))
+        custom = {int(fmt.get("numFmtId")): fmt.get("formatCode", "")
+                  for fmt in root.iter(_MAIN_NS + "numFmt")}
+        date_styles = set()
+        timedelta_styles = set()
+        cell_xfs = root.find(_MAIN_NS + "cellXfs")
+        for style_id, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+            fmt_id = int(xf.get("numFmtId", 0))
+            if fmt_id in custom:
+                code = custom[fmt_id].split(";")[0]
+                if _TIMEDELTA_FORMAT_RE.search(code):
+                    timedelta_styles.add(style_id)
+                if _DATE_FORMAT_RE.search(_DATE_FORMAT_STRIP_RE.sub("", code)):
+                    date_styles.add(style_id)
+            elif fmt_id in _BUILTIN_TIMEDELTA_FORMATS:
+                date_styles.add(style_id)
+                timedelta_styles.add(style_id)
+            elif fmt_id in _BUILTIN_DATE_FORMATS:
+                date_styles.add(style_id)
+        return date_styles, timedelta_styles
+
+    def decode_cell(self, cell):
+        data_type = cell.get("t", "n")
+        if data_type == "inlineStr":
+            inline = cell.find(_INLINE_TAG)
+            return _xml_text(inline) if inline is not None else None
+        value = cell.findtext(_VALUE_TAG) or None
+        if value is None:
+            return None
+        if data_type == "n":
+            number = float(value) if ("." in value or "E" in value or "e" in value) else int(value)
+            style_id = int(cell.get("s", 0))
+            if style_id not in self._date_styles:
+                return number
+            try:
+                if style_id in self._timedelta_styles:
+                    return timedelta(days=number)
+                return excel_serial_to_datetime(number, self.date1904)
+            except (OverflowError, ValueError):
+                return "#VALUE!"
+        if data_type == "s":
+            return self._shared_strings[int(value)]
+        if data_type == "b":
+            return bool(int(value))
+        if data_type == "d":
+            return datetime.fromisoformat(value)
+        return value
+
+    def iter_rows(self, sheet_name):
+        if sheet_name not in self._sheet_paths:
+            return iter(())
+        return _FastSheetRows(self, self._sheet_paths[sheet_name])
+
+    def select_columns(self, rows, columns):
+        if isinstance(rows, _FastSheetRows):
+            rows.columns = frozenset(columns)
+
+    def close(self):
+        self._zip.close()
+
+def open_workbook_reader(file_path, engine=None):
+    """依引擎開啟工作簿；回傳物件提供 sheetnames、iter_rows(sheet_name)、select_columns、close"""
+    engine = engine or READER_ENGINE
+    if engine == "xml":
+        return FastXlsxReader(file_path)
+    if engine == "openpyxl":
+        return _OpenpyxlReader(file_path)
+    raise ValueError(f"未知的讀取引擎：{engine}")
+
+def parse_sheet_incremental(rows, col_index, previous=None):
+    """
+    解析表頭之後的所有列（不限日期），回傳Sheet狀態：
+    {"row_count", "rows_hash", "col_index", "items", "parsed_rows"（本次新解析的記錄數）,
+     "appended"（是否沿用舊記錄）}
+    傳入上次狀態時先讀過舊列數範圍內的每一列並比對整體雜湊：相同則只解析新增列並接在舊記錄後；
+    列數變少或任何舊列被修改時回傳 None，由呼叫端改為完整解析
+    """
+    h = hashlib.blake2b(digest_size=16)
+    row_count = 0
+    items = []
+    if previous:
+        for row in itertools.islice(rows, previous["row_count"]):
+            h.update(repr(row).encode("utf-8"))
+            row_count += 1
+        if row_count < previous["row_count"] or h.hexdigest() != previous["rows_hash"]:
+            return None
+        items = list(previous["items"])
+
+    def counted_rows():
+        nonlocal row_count
+        for row in rows:
+            h.update(repr(row).encode("utf-8"))
+            row_count += 1
+            yield row
+
+    reused_count = len(items)
+    items.extend(iter_sheet_items(counted_rows(), col_index, None, None))
+    return {
+        "row_count": row_count,
+        "rows_hash": h.hexdigest(),
+        "col_index": col_index,
+        "items": items,
+        "parsed_rows": len(items) - reused_count,
+        "appended": previous is not None,
+    }
+
+def _sheet_body_rows(file_path, reader, sheet_name, progress=None, cancel_event=None):
+    """回傳 (欄位索引, 表頭之後的列迭代器)；非工作記錄Sheet或無資料列時回傳 (None, None)"""
+    rows = reader.iter_rows(sheet_name)
+    col_index = detect_header(file_path, sheet_name, rows)
+    if col_index is None:
+        return None, None
+    reader.select_columns(rows, col_index.values())
+    first_row = next(rows, None)
+    if first_row is None:
+        return None, None
+    body = itertools.chain([first_row], rows)
+    if progress or cancel_event is not None:
+        body = _watch_rows(body, sheet_name, progress, cancel_event)
+    return col_index, body
+
+def _pack_items(items):
+    """記錄轉為精簡list，供快取與程序間傳輸（已計算的 sorted_notes 一併保留）"""
+    return [x.pack() for x in items]
+
+def _unpack_items(rows):
+    return [WorkRecord(*r) for r in rows]
+
+def _filter_items(items, start_date, end_date):
+    start_ordinal = start_date.toordinal() if start_date else None
+    end_ordinal = end_date.toordinal() if end_date else None
+    return [x for x in items
+            if not (start_ordinal and x.ordinal < start_ordinal)
+            and not (end_ordinal and x.ordinal > end_ordinal)]
+
+def _parse_sheet(file_path, wb, sheet_name, start_date, end_date, sheet_states, progress=None, cancel_event=None):
+    """解析單一Sheet；非工作記錄Sheet回傳 None，否則回傳區間內記錄（sheet_states 不為 None 時就地更新）"""
+    col_index, body = _sheet_body_rows(file_path, wb, sheet_name, progress, cancel_event)
+    if col_index is None:
+        return None
+    if sheet_states is None:
+        return list(iter_sheet_items(body, col_index, start_date, end_date))
+
+    previous = sheet_states.get(sheet_name)
+    state = None
+    if previous and previous["col_index"] == col_index:
+        state = parse_sheet_incremental(body, col_index, previous)
+        if state is None:
+            print(f"Sheet [{sheet_name}] 舊資料已變更，改為完整解析")
+            col_index, body = _sheet_body_rows(file_path, wb, sheet_name, progress, cancel_event)
+    if state is None:
+        state = parse_sheet_incremental(body, col_index)
+    elif state["appended"]:
+        active_stats().count("incremental_sheets")
+    sheet_states[sheet_name] = state
+    return _filter_items(state["items"], start_date, end_date)
+
+def _parse_sheet_group(file_path, sheet_names, start_date, end_date, sheet_states, engine, pack=False,
+                       progress=None, cancel_event=None):
+    """
+    開啟一次工作簿並依序解析一組Sheet（sheet_names 為 None 時解析全部）
+    回傳 ([(sheet_name, 區間內記錄)], sheet_states, 統計)，只包含工作記錄Sheet
+    pack=True 時（子程序）記錄改為精簡tuple以降低程序間傳輸成本，並回傳本組的統計供主程序合併；
+    否則統計直接記錄在目前啟用的 RunStats，回傳 None
+    """
+    if pack:
+        with RunStats("子程序").activate() as stats:
+            results, sheet_states, _ = _parse_sheet_group(file_path, sheet_names, start_date, end_date, sheet_states,
+                                                          engine, progress=progress, cancel_event=cancel_event)
+        if sheet_states is not None:
+            # 增量模式由主程序依合併後的狀態重新篩選，不需回傳記錄
+            results = [(sheet_name, None) for sheet_name, _ in results]
+            for state in sheet_states.values():
+                state["items"] = _pack_items(state["items"])
+        else:
+            results = [(sheet_name, _pack_items(items)) for sheet_name, items in results]
+        return results, sheet_states, stats.to_dict()
+
+    stats = active_stats()
+    results = []
+    with stats.stage("開啟工作簿"):
+        wb = open_workbook_reader(file_path, engine)
+    try:
+        sheet_names = wb.sheetnames if sheet_names is None else sheet_names
+        stats.count("sheets_total", len(sheet_names))
+        for done, sheet_name in enumerate(sheet_names):
+            check_cancelled(cancel_event)
+            if progress:
+                progress(done, len(sheet_names), f"讀取 {sheet_name}")
+            try:
+                with stats.stage("讀取與解析列"):
+                    sheet_items = _parse_sheet(file_path, wb, sheet_name, start_date, end_date, sheet_states,
+                                               progress, cancel_event)
+            except OperationCancelled:
+                raise
             except Exception as e:
                 print(f"Sheet [{sheet_name}] 跳過：{e}")
+                stats.count("sheets_skipped")
                 continue
+            if sheet_items is not None:
+                results.append((sheet_name, sheet_items))
+            else:
+                stats.count("sheets_skipped")
+        if progress:
+            progress(len(sheet_names), len(sheet_names), "讀取完成")
+    finally:
         wb.close()
+    return results, sheet_states, None
+
+def _spawn_process_pool(workers):
+    """
+    以 spawn 啟動子程序的程序池：可能從介面的背景執行緒建立，
+    避免 fork 時複製 Tk 與圖表繪製執行緒的狀態
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def _parse_sheets_parallel(file_path, start_date, end_date, sheet_states, engine, workers,
+                           progress=None, cancel_event=None):
+    """
+    以程序池平行解析：每個子程序開啟一次工作簿並處理一組Sheet，
+    結果依 wb.sheetnames 的順序合併，與逐一解析的輸出相同
+    進度以每組Sheet完成為單位回報；取消時不再等待執行中的子程序
+    """
+    sheet_names = read_sheet_names(file_path)
+    groups = [sheet_names[i::workers] for i in range(min(workers, len(sheet_names)))]
+    results = {}
+    pool = _spawn_process_pool(len(groups))
+    cancelled = False
+    try:
+        pending = {}
+        for group in groups:
+            group_states = None
+            if sheet_states is not None:
+                # 舊記錄留在主程序，子程序只需列數與整體雜湊
+                group_states = {name: dict(sheet_states[name], items=[]) for name in group if name in sheet_states}
+            future = pool.submit(_parse_sheet_group, file_path, group, start_date, end_date, group_states, engine, True)
+            pending[future] = group
+        done_sheets = 0
+        while pending:
+            finished, _ = wait(pending, timeout=JOB_POLL_MS / 1000, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                raise OperationCancelled()
+            for future in finished:
+                done_sheets += len(pending.pop(future))
+                if progress:
+                    progress(done_sheets, len(sheet_names), f"已解析 {done_sheets}/{len(sheet_names)} 個Sheet")
+                _merge_group_result(future.result(), results, sheet_states, start_date, end_date)
+    finally:
+        pool.shutdown(wait=not cancelled, cancel_futures=cancelled)
+    return [(sheet_name, results[sheet_name]) for sheet_name in sheet_names if sheet_name in results]
+
+def _merge_group_result(group_result, results, sheet_states, start_date, end_date):
+    """將子程序回傳的一組Sheet結果還原並併入 results / sheet_states"""
+    group_results, new_states, group_stats = group_result
+    active_stats().merge(group_stats)
+    if sheet_states is not None:
+        for sheet_name, state in new_states.items():
+            state["items"] = _unpack_items(state["items"])
+            if state["appended"]:
+                state["items"] = sheet_states[sheet_name]["items"] + state["items"]
+            sheet_states[sheet_name] = state
+    for sheet_name, packed in group_results:
+        if packed is None:
+            results[sheet_name] = _filter_items(sheet_states[sheet_name]["items"], start_date, end_date)
+        else:
+            results[sheet_name] = _unpack_items(packed)
+
+def read_excel_full_data(file_path, start_date, end_date, sheet_states=None, engine=None, workers=None,
+                         progress=None, cancel_event=None):
+    """
+    sheet_states：傳入 dict 時啟用增量解析，記住各Sheet的列數與整體雜湊，
+    再次讀取時只解析新增的列；dict 會就地更新為本次各Sheet狀態
+    engine：讀取引擎，未指定時使用 READER_ENGINE
+    workers：平行解析的子程序數量，未指定時使用 PARSE_WORKERS
+    progress：進度回呼 progress(已完成, 總數, 訊息)，每個Sheet開始時與每 PROGRESS_ROW_STEP 列呼叫一次
+              （僅有訊息時已完成/總數為 None）
+    cancel_event：threading.Event，設定後讀取會在下一個檢查點停止並回傳錯誤 CANCELLED_MSG
+    """
+    if not os.path.exists(file_path) or not file_path.lower().endswith('.xlsx'):
+        return None, None, "檔案錯誤"
+    
+    raw_data = {}
+    valid_sheets = []
+    workers = workers or PARSE_WORKERS
+
+    try:
+        if workers > 1:
+            results = _parse_sheets_parallel(file_path, start_date, end_date, sheet_states, engine, workers,
+                                             progress, cancel_event)
+        else:
+            results, _, _ = _parse_sheet_group(file_path, None, start_date, end_date, sheet_states, engine,
+                                            progress=progress, cancel_event=cancel_event)
+        for sheet_name, sheet_items in results:
+            valid_sheets.append(sheet_name)
+            if sheet_items:
+                raw_data[sheet_name] = sheet_items
+
+        if sheet_states is not None:
+            # 移除已不存在的Sheet，並依Sheet順序排列（平行解析時完成順序不固定）
+            ordered = {sheet_name: sheet_states[sheet_name] for sheet_name in valid_sheets if sheet_name in sheet_states}
+            sheet_states.clear()
+            sheet_states.update(ordered)
         
         if not raw_data:
             return None, None, "無有效數據"
         return raw_data, valid_sheets, None
+    except OperationCancelled:
+        return None, None, CANCELLED_MSG
     except Exception as e:
         return None, None, str(e)
 
+# ==========================================
+# 日期索引（讀取一次，之後的日期區間直接從記憶體切片）
+# ==========================================
+def file_fingerprint(file_path):
+    st = os.stat(file_path)
+    return (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+
+class WorkbookDateIndex:
+    """每個Sheet的記錄依日期（序數）排序，日期區間以 bisect 切片取得"""
+
+    def __init__(self, file_path, raw_data, valid_sheets, sheet_states=None, source="disk"):
+        self.fingerprint = file_fingerprint(file_path)
+        self.valid_sheets = valid_sheets
+        # 各Sheet增量解析狀態，供下次檔案變更時只解析新增的列
+        self.sheet_states = sheet_states or {}
+        self.source = source
+        self.parsed_rows = sum(state.get("parsed_rows", 0) for state in self.sheet_states.values())
+        self.sheets = {}
+        for sheet_name, items in raw_data.items():
+            items = sorted(items, key=lambda x: x.ordinal)
+            self.sheets[sheet_name] = ([x.ordinal for x in items], items)
+
+    @property
+    def row_count(self):
+        return sum(len(items) for _, items in self.sheets.values())
+
+    def is_current(self, file_path):
+        try:
+            return file_fingerprint(file_path) == self.fingerprint
+        except OSError:
+            return False
+
+    def query(self, start_date, end_date):
+        raw_data = {}
+        for sheet_name, (dates, items) in self.sheets.items():
+            lo = bisect_left(dates, start_date.toordinal())
+            hi = bisect_right(dates, end_date.toordinal())
+            if lo < hi:
+                raw_data[sheet_name] = items[lo:hi]
+        return raw_data
+
+def load_date_index(file_path, previous=None, engine=None, progress=None, cancel_event=None):
+    """
+    建立整份檔案（不限日期）的日期索引
+    優先使用解析快取；未命中時以 openpyxl 讀取並寫回快取，
+    若有同一檔案的舊索引（previous）或舊快取，只解析新增的列
+    回傳的索引 source 屬性為 "cache" 或 "disk"，parsed_rows 為本次實際解析出的記錄數
+    """
+    if not os.path.exists(file_path):
+        return None, "檔案錯誤"
+    stats = active_stats()
+    with stats.stage("解析快取"):
+        cached = parse_cache_get(file_path)
+    if cached:
+        stats.count("parse_cache_hits")
+        sheet_states, valid_sheets = cached
+        with stats.stage("建立日期索引"):
+            return WorkbookDateIndex(file_path, _states_to_raw_data(sheet_states), valid_sheets,
+                                     sheet_states, source="cache"), None
+    stats.count("parse_cache_misses")
+
+    if previous is not None and previous.fingerprint[0] == os.path.abspath(file_path):
+        sheet_states = dict(previous.sheet_states)
+    else:
+        sheet_states = parse_cache_get_previous(file_path)
+    raw_data, valid_sheets, err = read_excel_full_data(file_path, None, None, sheet_states=sheet_states, engine=engine,
+                                                       progress=progress, cancel_event=cancel_event)
+    if err:
+        return None, err
+    with stats.stage("寫入快取"):
+        parse_cache_put(file_path, sheet_states, valid_sheets)
+    with stats.stage("建立日期索引"):
+        return WorkbookDateIndex(file_path, raw_data, valid_sheets, sheet_states), None
+
+def _states_to_raw_data(sheet_states):
+    return {sheet_name: state["items"] for sheet_name, state in sheet_states.items() if state["items"]}
+
+# ==========================================
+# 資料夾模式（合併資料夾內所有Excel，Sheet名稱加上檔名前綴）
+# ==========================================
+def list_folder_workbooks(folder):
+    """資料夾內的 .xlsx（略過 Excel 開啟中的暫存檔 ~$xxx.xlsx）"""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(".xlsx") and not name.startswith("~$"))
+
+def folder_snapshot(folder):
+    """{檔案路徑: (大小, 修改時間)}，用於輪詢偵測變更"""
+    snapshot = {}
+    for path in list_folder_workbooks(folder):
+        try:
+            st = os.stat(path)
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            continue
+    return snapshot
+
+class FolderWatcher:
+    """以大小/修改時間輪詢資料夾，回傳上次檢查後新增、變更或刪除的檔案"""
+
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.snapshot = folder_snapshot(folder)
+
+    def changes(self):
+        try:
+            current = folder_snapshot(self.folder)
+        except OSError:
+            return []
+        changed = [p for p, sig in current.items() if self.snapshot.get(p) != sig]
+        changed += [p for p in self.snapshot if p not in current]
+        self.snapshot = current
+        return changed
+
+def _prefetch_parse(file_path):
+    """資料夾預先解析（子程序）：解析並寫入解析快取，回傳本次實際從檔案解析的記錄數"""
+    index, err = load_date_index(file_path)
+    return index.parsed_rows if index is not None and index.source == "disk" else 0
+
+class FolderDateIndex:
+    """
+    資料夾內每個檔案各自一個 WorkbookDateIndex，查詢時合併
+    Sheet名稱為「檔名/Sheet」；再次 scan 時只重新解析大小或修改時間有變的檔案
+    介面與 WorkbookDateIndex 相同（valid_sheets / query / source / row_count / parsed_rows）
+    """
+
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.indexes = {}
+        self.valid_sheets = []
+        self.source = "disk"
+        self.parsed_rows = 0
+        self.errors = {}
+
+    @property
+    def row_count(self):
+        return sum(index.row_count for index in self.indexes.values())
+
+    @staticmethod
+    def sheet_prefix(file_path):
+        return os.path.splitext(os.path.basename(file_path))[0] + FOLDER_SHEET_SEPARATOR
+
+    def is_current(self, folder):
+        if os.path.abspath(folder) != self.folder:
+            return False
+        try:
+            paths = list_folder_workbooks(self.folder)
+        except OSError:
+            return False
+        return paths == sorted(self.indexes) and all(self.indexes[p].is_current(p) for p in paths)
+
+    def scan(self, workers=None, progress=None, cancel_event=None):
+        """重新掃描資料夾：只解析新增/變更的檔案，刪除的檔案自索引移除；回傳本次解析的檔案清單"""
+        paths = list_folder_workbooks(self.folder)
+        for path in list(self.indexes):
+            if path not in paths:
+                del self.indexes[path]
+        changed = [p for p in paths if p not in self.indexes or not self.indexes[p].is_current(p)]
+
+        # 多個檔案變更時先以子程序平行解析（結果寫入解析快取），再由快取載入
+        workers = workers or BATCH_WORKERS or os.cpu_count() or 1
+        prefetched = {}
+        if len(changed) > 1 and workers > 1:
+            prefetched = self._prefetch(changed, min(workers, len(changed)), progress, cancel_event)
+
+        self.parsed_rows = 0
+        self.errors = {}
+        for file_no, path in enumerate(changed):
+            check_cancelled(cancel_event)
+            if progress:
+                progress(file_no, len(changed), f"讀取 {os.path.basename(path)}")
+            index, err = load_date_index(path, previous=self.indexes.get(path), cancel_event=cancel_event)
+            if err == CANCELLED_MSG:
+                raise OperationCancelled()
+            if err:
+                self.errors[path] = err
+                self.indexes.pop(path, None)
+                continue
+            self.indexes[path] = index
+            self.parsed_rows += index.parsed_rows if index.source == "disk" else prefetched.get(path, 0)
+        self.source = "disk" if self.parsed_rows else "cache"
+        self.valid_sheets = [self.sheet_prefix(path) + sheet
+                             for path in sorted(self.indexes) for sheet in self.indexes[path].valid_sheets]
+        return changed
+
+    @staticmethod
+    def _prefetch(paths, workers, progress=None, cancel_event=None):
+        """
+        逐檔送入程序池解析並寫入解析快取；每完成一個檔案回報進度，取消時不再等待執行中的子程序
+        回傳 {檔案路徑: 從檔案解析的記錄數}（之後由快取載入時 source 為 "cache"，解析筆數以此為準）
+        """
+        pool = _spawn_process_pool(workers)
+        cancelled = False
+        try:
+            pending = {pool.submit(_prefetch_parse, path): path for path in paths}
+            parsed = {}
+            done_files = 0
+            while pending:
+                finished, _ = wait(pending, timeout=JOB_POLL_MS / 1000, return_when=FIRST_COMPLETED)
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    raise OperationCancelled()
+                for future in finished:
+                    path = pending.pop(future)
+                    parsed[path] = future.result()
+                    done_files += 1
+                    if progress:
+                        progress(done_files, len(paths), f"已解析 {done_files}/{len(paths)} 個檔案（{os.path.basename(path)}）")
+        finally:
+            pool.shutdown(wait=not cancelled, cancel_futures=cancelled)
+        return parsed
+
+    def query(self, start_date, end_date):
+        raw_data = {}
+        for path in sorted(self.indexes):
+            prefix = self.sheet_prefix(path)
+            for sheet_name, items in self.indexes[path].query(start_date, end_date).items():
+                raw_data[prefix + sheet_name] = items
+        return raw_data
+
+# ==========================================
+# 解析結果快取（SQLite，鍵值：路徑 + 大小 + 修改時間 + 內容雜湊）
+# ==========================================
+# 快取格式或表頭規則變更時自動失效
+PARSE_CACHE_VERSION = 6
+
+def _parse_cache_salt():
+    rules = json.dumps([PARSE_CACHE_VERSION, HEADER_MAPPING, HEADER_PROBE_ROWS],
+                       ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(rules.encode("utf-8")).hexdigest()
+
+def file_content_hash(file_path):
+    h = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _open_parse_cache():
+    conn = sqlite3.connect(PARSE_CACHE_FILE)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS parse_cache (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            salt TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            payload_size INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_hash ON parse_cache(content_hash)")
+    return conn
+
+def _encode_cache_payload(sheet_states, valid_sheets):
+    sheets = {
+        sheet_name: {
+            "row_count": state["row_count"],
+            "rows_hash": state["rows_hash"],
+            "col_index": state["col_index"],
+            "rows": _pack_items(state["items"]),
+        }
+        for sheet_name, state in sheet_states.items()
+    }
+    data = json.dumps({"valid_sheets": valid_sheets, "sheets": sheets}, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(data.encode("utf-8"))
+
+def _decode_cache_payload(payload):
+    data = json.loads(zlib.decompress(payload).decode("utf-8"))
+    sheet_states = {}
+    for sheet_name, sheet in data["sheets"].items():
+        sheet_states[sheet_name] = {
+            "row_count": sheet["row_count"],
+            "rows_hash": sheet["rows_hash"],
+            "col_index": sheet["col_index"],
+            "items": _unpack_items(sheet["rows"]),
+            "parsed_rows": 0,
+            "appended": False,
+        }
+    return sheet_states, data["valid_sheets"]
+
+def parse_cache_get(file_path):
+    """
+    命中時回傳 (sheet_states, valid_sheets)，否則回傳 None
+    路徑、大小、修改時間相同時直接命中；否則比對內容雜湊（例如檔案被複製或僅更新時間）
+    """
+    try:
+        path, size, mtime_ns = file_fingerprint(file_path)
+        salt = _parse_cache_salt()
+        conn = _open_parse_cache()
+        try:
+            row = conn.execute("SELECT payload FROM parse_cache WHERE path=? AND size=? AND mtime_ns=? AND salt=?",
+                               (path, size, mtime_ns, salt)).fetchone()
+            if row is None:
+                content_hash = file_content_hash(file_path)
+                row = conn.execute("SELECT payload FROM parse_cache WHERE content_hash=? AND size=? AND salt=?",
+                                   (content_hash, size, salt)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (path, size, mtime_ns, content_hash, salt, row[0], len(row[0]), time.time()))
+            else:
+                conn.execute("UPDATE parse_cache SET last_used=? WHERE path=?", (time.time(), path))
+            conn.commit()
+            return _decode_cache_payload(row[0])
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError, ValueError, KeyError, zlib.error) as e:
+        print(f"解析快取讀取失敗：{e}")
+        return None
+
+def parse_cache_get_previous(file_path):
+    """取得同一路徑的舊快取（不論檔案是否已變更）的Sheet狀態，作為增量解析的基礎"""
+    try:
+        conn = _open_parse_cache()
+        try:
+            row = conn.execute("SELECT payload FROM parse_cache WHERE path=? AND salt=?",
+                               (os.path.abspath(file_path), _parse_cache_salt())).fetchone()
+        finally:
+            conn.close()
+        return _decode_cache_payload(row[0])[0] if row else {}
+    except (sqlite3.Error, OSError, ValueError, KeyError, zlib.error) as e:
+        print(f"解析快取讀取失敗：{e}")
+        return {}
+
+def parse_cache_put(file_path, sheet_states, valid_sheets):
+    """寫入（或覆蓋同路徑的舊）快取，並依容量上限淘汰最久未使用的項目"""
+    try:
+        path, size, mtime_ns = file_fingerprint(file_path)
+        payload = _encode_cache_payload(sheet_states, valid_sheets)
+        if len(payload) > PARSE_CACHE_MAX_BYTES:
+            return
+        conn = _open_parse_cache()
+        try:
+            conn.execute("INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (path, size, mtime_ns, file_content_hash(file_path), _parse_cache_salt(),
+                          payload, len(payload), time.time()))
+            total = conn.execute("SELECT COALESCE(SUM(payload_size), 0) FROM parse_cache").fetchone()[0]
+            if total > PARSE_CACHE_MAX_BYTES:
+                for old_path, old_size in conn.execute(
+                        "SELECT path, payload_size FROM parse_cache WHERE path<>? ORDER BY last_used", (path,)).fetchall():
+                    conn.execute("DELETE FROM parse_cache WHERE path=?", (old_path,))
+                    total -= old_size
+                    if total <= PARSE_CACHE_MAX_BYTES:
+                        break
+            conn.commit()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"解析快取寫入失敗：{e}")
+
+def parse_cache_invalidate(file_path=None):
+    """清除指定檔案的快取；未指定時清空全部"""
+    try:
+        conn = _open_parse_cache()
+        try:
+            if file_path is None:
+                conn.execute("DELETE FROM parse_cache")
+            else:
+                conn.execute("DELETE FROM parse_cache WHERE path=?", (os.path.abspath(file_path),))
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"解析快取清除失敗：{e}")
+
+# ==========================================
+# 歷史資料庫（SQLite，依日期/Sheet/狀態/作業名稱建立索引，跨年度查詢不需重新讀取Excel）
+# ==========================================
+# Python 日期序數轉 SQLite 儒略日（0001-01-01 為序數 1）
+_ORDINAL_TO_JULIAN = 1721424.5
+# group_counts 可用的分組欄位
+HISTORY_GROUP_COLUMNS = {
+    "date": "r.ordinal",
+    "week": "r.ordinal - (r.ordinal - 1) % 7",
+    "month": f"strftime('%Y-%m', r.ordinal + {_ORDINAL_TO_JULIAN})",
+    "sheet": "r.sheet",
+    "status": "r.status",
+    "title": "r.title",
+    "file": "f.path",
+}
+
+class HistoryStore:
+    """
+    將 read_excel_full_data / 日期索引的記錄寫入本機 SQLite，之後的日期區間與分組統計直接查詢資料庫
+    每次操作各自開啟連線（可在背景執行緒使用）；同一檔案再次寫入時整份取代
+    """
+
+    def __init__(self, path=None):
+        self.path = path or HISTORY_DB_FILE
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                salt TEXT NOT NULL DEFAULT '',
+                sheets TEXT NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                file_id INTEGER NOT NULL REFERENCES files(id),
+                sheet TEXT NOT NULL,
+                ordinal INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                title TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                note TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_date ON records(ordinal);
+            CREATE INDEX IF NOT EXISTS idx_records_file ON records(file_id, ordinal);
+            CREATE INDEX IF NOT EXISTS idx_records_sheet ON records(sheet, ordinal);
+            CREATE INDEX IF NOT EXISTS idx_records_status ON records(status, ordinal);
+            CREATE INDEX IF NOT EXISTS idx_records_title ON records(title, ordinal);
+        """)
+        # 舊版資料庫沒有 salt 欄位：補上空值，所有檔案視為過期並在下次讀取時重新寫入
+        if "salt" not in {row[1] for row in conn.execute("PRAGMA table_info(files)")}:
+            conn.execute("ALTER TABLE files ADD COLUMN salt TEXT NOT NULL DEFAULT ''")
+        return conn
+
+    def is_current(self, file_path):
+        """資料庫中的檔案大小/修改時間與目前檔案相同，且寫入時的解析規則（_parse_cache_salt）未變更時回傳 True"""
+        try:
+            path, size, mtime_ns = file_fingerprint(file_path)
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT size, mtime_ns, salt FROM files WHERE path=?", (path,)).fetchone()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"歷史資料庫讀取失敗：{e}")
+            return False
+        return row == (size, mtime_ns, _parse_cache_salt())
+
+    def ingest(self, file_path, index):
+        """以日期索引（WorkbookDateIndex）的全部記錄取代資料庫中該檔案的記錄，回傳寫入筆數"""
+        path, size, mtime_ns = index.fingerprint
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO files (path, size, mtime_ns, salt, sheets, ingested_at) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET size=excluded.size, mtime_ns=excluded.mtime_ns,
+                        salt=excluded.salt, sheets=excluded.sheets, ingested_at=excluded.ingested_at""",
+                             (path, size, mtime_ns, _parse_cache_salt(),
+                              json.dumps(index.valid_sheets, ensure_ascii=False), time.time()))
+                file_id = conn.execute("SELECT id FROM files WHERE path=?", (path,)).fetchone()[0]
+                conn.execute("DELETE FROM records WHERE file_id=?", (file_id,))
+                conn.executemany(
+                    "INSERT INTO records (file_id, sheet, ordinal, status, title, progress, note) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((file_id, sheet_name) + item.astuple()
+                     for sheet_name, (_, items) in index.sheets.items() for item in items))
+        finally:
+            conn.close()
+        return index.row_count
+
+    def sheets(self, file_path):
+        """該檔案的工作記錄Sheet（原本的順序）"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT sheets FROM files WHERE path=?", (os.path.abspath(file_path),)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else []
+
+    @staticmethod
+    def _where(start_date, end_date, file_path, sheets, statuses, titles):
+        clauses, params = [], []
+        if start_date:
+            clauses.append("r.ordinal >= ?")
+            params.append(start_date.toordinal())
+        if end_date:
+            clauses.append("r.ordinal <= ?")
+            params.append(end_date.toordinal())
+        if file_path:
+            clauses.append("f.path = ?")
+            params.append(os.path.abspath(file_path))
+        for column, values in (("r.sheet", sheets), ("r.status", statuses), ("r.title", titles)):
+            if values is not None:
+                values = list(values)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start_date=None, end_date=None, file_path=None, sheets=None, statuses=None, titles=None):
+        """
+        日期區間（含頭尾，None 表示不限）內的記錄，格式同 read_excel_full_data 的 raw_data：{Sheet: [WorkRecord]}
+        各Sheet內依日期排序；sheets / statuses / titles 為 None 時不篩選
+        """
+        where, params = self._where(start_date, end_date, file_path, sheets, statuses, titles)
+        raw_data = {}
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT r.sheet, r.ordinal, r.status, r.title, r.progress, r.note "
+                                "FROM records r JOIN files f ON f.id = r.file_id" + where +
+                                " ORDER BY r.ordinal, r.id", params)
+            for sheet_name, *fields in rows:
+                items = raw_data.get(sheet_name)
+                if items is None:
+                    items = raw_data[sheet_name] = []
+                items.append(WorkRecord(*fields))
+        finally:
+            conn.close()
+        return raw_data
+
+    def group_counts(self, by=("date", "sheet", "status"), start_date=None, end_date=None, file_path=None,
+                     sheets=None, statuses=None, titles=None):
+        """
+        分組筆數：回傳 [(分組值..., 筆數)]，依分組值排序
+        by 可用 HISTORY_GROUP_COLUMNS 的鍵（date 為日期序數、week 為該週週一的序數、month 為 YYYY-MM）
+        """
+        columns = [HISTORY_GROUP_COLUMNS[key] for key in by]
+        where, params = self._where(start_date, end_date, file_path, sheets, statuses, titles)
+        group = ", ".join(columns)
+        sql = (f"SELECT {group}, COUNT(*) FROM records r JOIN files f ON f.id = r.file_id{where} "
+               f"GROUP BY {group} ORDER BY {group}")
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def remove(self, file_path):
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT id FROM files WHERE path=?", (os.path.abspath(file_path),)).fetchone()
+                if row:
+                    conn.execute("DELETE FROM records WHERE file_id=?", row)
+                    conn.execute("DELETE FROM files WHERE id=?", row)
+        finally:
+            conn.close()
+
 # ==========================================
 # Excel自動格式化函數（優化：僅設置字體與自動換行，不覆蓋對齊）
 # ==========================================
 def format_excel_cells(file_path):
     """
     將Excel所有工作表的儲存格設定為：
-    1. 文字大小 11
+    1. 文字大小 REPORT_BODY_FONT_SIZE
     2. 啟用自動換行
     （對齊方式在寫入時單獨設置，避免覆蓋標題的居中格式）
     """
-    wb = load_workbook(file_path)
+    wb = openpyxl.load_workbook(file_path)
     
     # 定義樣式：僅保留自動換行，對齊方式單獨設置
-    alignment_style = Alignment(wrap_text=True)
-    font_style = Font(size=11, name=FONT_NAME)
+    alignment_style = _xl_styles.Alignment(wrap_text=True)
+    font_style = _xl_styles.Font(size=REPORT_BODY_FONT_SIZE, name=FONT_NAME)
 
     # 處理所有工作表
     for ws in wb.worksheets:
@@ -255,7 +1583,788 @@ def format_excel_cells(file_path):
                 cell.font = font_style
 
     wb.save(file_path)
-    print(f"Excel 格式設定完成！文字大小已設定為11")
+    print(f"Excel 格式設定完成！文字大小已設定為{REPORT_BODY_FONT_SIZE}")
+
+# ==========================================
+# 圖表統計（日期 × Sheet × 狀態 的筆數立方體）
+# ==========================================
+class ChartCube:
+    """
+    每次載入建立一次的 NumPy 筆數立方體 counts[日期, Sheet, 狀態]（日期由新到舊）
+    調整加權或勾選時只做矩陣運算，不再逐筆走訪記錄
+    """
+
+    def __init__(self, raw_data, sheets):
+        self._build(sheets, ((sheet_name, item.ordinal, item.status, 1)
+                             for sheet_name, items in raw_data.items() for item in items))
+
+    @classmethod
+    def from_counts(cls, grouped, sheets):
+        """由分組筆數 [(日期序數, Sheet, 狀態, 筆數)] 建立（例如 HistoryStore.group_counts 的結果）"""
+        cube = cls.__new__(cls)
+        cube._build(sheets, ((sheet_name, ordinal, status, n) for ordinal, sheet_name, status, n in grouped))
+        return cube
+
+    def _build(self, sheets, entries):
+        """entries：(Sheet, 日期序數, 狀態, 筆數)，不在 sheets 內的Sheet略過"""
+        self.sheets = list(sheets)
+        sheet_pos = {sheet_name: i for i, sheet_name in enumerate(self.sheets)}
+        self.statuses = []
+        status_pos = {}
+        ordinals, sheet_idx, status_idx, weights = [], [], [], []
+        for sheet_name, ordinal, status, n in entries:
+            if sheet_name not in sheet_pos:
+                continue
+            pos = status_pos.get(status)
+            if pos is None:
+                pos = status_pos[status] = len(self.statuses)
+                self.statuses.append(status)
+            ordinals.append(ordinal)
+            sheet_idx.append(sheet_pos[sheet_name])
+            status_idx.append(pos)
+            weights.append(n)
+
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        self.dates = np.unique(ordinals)[::-1]
+        date_idx = len(self.dates) - 1 - np.searchsorted(self.dates[::-1], ordinals)
+        shape = (len(self.dates), len(self.sheets), max(len(self.statuses), 1))
+        flat = np.ravel_multi_index((date_idx, np.asarray(sheet_idx, dtype=np.int64),
+                                     np.asarray(status_idx, dtype=np.int64)), shape)
+        self.counts = np.bincount(flat, weights=np.asarray(weights, dtype=np.int64),
+                                  minlength=int(np.prod(shape))).astype(np.int64).reshape(shape)
+        # 不分狀態的 日期 × Sheet 筆數，加權計算最常用
+        self.date_sheet = self.counts.sum(axis=2)
+        self.date_labels = [date.fromordinal(int(d)).isoformat() for d in self.dates]
+        # 各日期所屬的週（週一的序數）與月份（年*12+月）
+        days = [date.fromordinal(int(d)) for d in self.dates]
+        self.bucket_keys = {
+            "day": self.dates,
+            "week": self.dates - (self.dates - 1) % 7,
+            "month": np.array([d.year * 12 + d.month - 1 for d in days], dtype=np.int64),
+        }
+
+    def auto_bucket(self):
+        """依資料跨度決定彙總單位：日 / 週 / 月"""
+        span = int(self.dates[0] - self.dates[-1]) if len(self.dates) else 0
+        if span <= CHART_BUCKET_DAY_MAX_DAYS:
+            return "day"
+        if span <= CHART_BUCKET_WEEK_MAX_DAYS:
+            return "week"
+        return "month"
+
+    @staticmethod
+    def bucket_label(bucket, key):
+        if bucket == "week":
+            return f"{date.fromordinal(int(key)).isoformat()}週"
+        if bucket == "month":
+            return f"{key // 12}-{key % 12 + 1:02d}"
+        return date.fromordinal(int(key)).isoformat()
+
+    def layers(self, weights, sheets=None, statuses=None, default_weight=0.1, bucket="day"):
+        """
+        回傳 (日期標籤, 加權後矩陣[日期, Sheet])，只保留選取範圍內有資料的日期
+        sheets / statuses 為 None 時包含全部；bucket 為 "day" / "week" / "month" / "auto"
+        """
+        sheets = self.sheets if sheets is None else sheets
+        columns = [self.sheets.index(s) for s in sheets]
+        if statuses is None:
+            raw = self.date_sheet[:, columns]
+        else:
+            status_columns = [self.statuses.index(s) for s in statuses if s in self.statuses]
+            raw = self.counts[:, columns][:, :, status_columns].sum(axis=2)
+        weight_vector = np.array([weights.get(s, default_weight) for s in sheets], dtype=float)
+        if bucket == "auto":
+            bucket = self.auto_bucket()
+        if bucket == "day":
+            keys = self.dates
+            labels = self.date_labels
+        else:
+            # 日期已由新到舊排列，同一區間相鄰；以 unique 的反向索引加總各區間
+            unique_keys, inverse = np.unique(self.bucket_keys[bucket], return_inverse=True)
+            summed = np.zeros((len(unique_keys), raw.shape[1]), dtype=raw.dtype)
+            np.add.at(summed, inverse, raw)
+            keys = unique_keys[::-1]
+            raw = summed[::-1]
+            labels = [self.bucket_label(bucket, k) for k in keys]
+        keep = raw.sum(axis=1) > 0
+        labels = [label for label, k in zip(labels, keep) if k]
+        return labels, raw[keep] * weight_vector
+
+def query_range(index, start_date, end_date):
+    """
+    從日期索引（WorkbookDateIndex / FolderDateIndex）切出日期區間並建立圖表立方體
+    逐筆走訪區間內記錄，於背景工作內呼叫；回傳 (raw_data, valid_sheets, chart_cube)
+    """
+    stats = active_stats()
+    with stats.stage("切出日期區間"):
+        raw_data = index.query(start_date, end_date)
+    with stats.stage("建立圖表立方體"):
+        chart_cube = ChartCube(raw_data, index.valid_sheets)
+    return raw_data, index.valid_sheets, chart_cube
+
+def _bar_verts(x_pos, bottoms, heights, width=0.8):
+    """一次產生整層長條的多邊形頂點 (n, 4, 2)"""
+    verts = np.empty((len(x_pos), 4, 2))
+    left = x_pos - width / 2
+    right = x_pos + width / 2
+    top = bottoms + heights
+    verts[:, 0, 0] = left
+    verts[:, 0, 1] = bottoms
+    verts[:, 1, 0] = left
+    verts[:, 1, 1] = top
+    verts[:, 2, 0] = right
+    verts[:, 2, 1] = top
+    verts[:, 3, 0] = right
+    verts[:, 3, 1] = bottoms
+    return verts
+
+class StackedBarChart:
+    """
+    加權堆疊長條圖：整個程式只保留一個 Figure 與 Canvas
+    每個Sheet一層，以單一 PolyCollection 繪製（不論日期數多少，每層只有一個繪圖物件）
+    日期與Sheet組成不變時（只改加權），直接更新各層頂點與總計標籤後 draw_idle；
+    組成改變時才清空座標軸重畫。Figure 不經過 pyplot，不會累積在 pyplot 的圖表登錄中
+    master 為 None 時使用離屏 Agg 畫布（背景產生匯出圖片用），不會觸發畫面重繪
+    """
+
+    def __init__(self, master=None):
+        # matplotlib 在第一次畫圖時才載入
+        from matplotlib.figure import Figure
+        matplotlib.rcParams["font.sans-serif"] = [FONT_NAME, "SimHei"]
+        matplotlib.rcParams["axes.unicode_minus"] = False
+        self.figure = Figure(figsize=(9, 4), dpi=120)
+        self.ax = self.figure.add_subplot()
+        self.offscreen = master is None
+        if self.offscreen:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self._layout = None
+        self._layers = []
+        self._total_texts = []
+
+    def update(self, date_labels, sheets, layers):
+        bottoms = np.cumsum(layers, axis=1) - layers
+        totals = layers.sum(axis=1)
+        x_pos = np.arange(len(date_labels), dtype=float)
+        layout = (tuple(date_labels), tuple(sheets))
+        if layout != self._layout:
+            self._rebuild(date_labels, sheets, x_pos, layers, bottoms)
+            self._layout = layout
+        else:
+            for i, collection in enumerate(self._layers):
+                collection.set_verts(_bar_verts(x_pos, bottoms[:, i], layers[:, i]))
+        self._update_totals(totals)
+        self.ax.set_xlim(-0.6, max(len(date_labels), 1) - 0.4)
+        self.ax.set_ylim(0, (totals.max() if len(totals) else 0) * 1.08 + 0.3)
+        if not self.offscreen:
+            self.canvas.draw_idle()
+
+    def _rebuild(self, date_labels, sheets, x_pos, layers, bottoms):
+        from matplotlib.collections import PolyCollection
+        ax = self.ax
+        ax.clear()
+        colors = matplotlib.colormaps["tab10"].colors
+        self._layers = []
+        for i, sheet in enumerate(sheets):
+            collection = PolyCollection(_bar_verts(x_pos, bottoms[:, i], layers[:, i]),
+                                        facecolors=colors[i % len(colors)], label=sheet)
+            ax.add_collection(collection, autolim=False)
+            self._layers.append(collection)
+
+        # 標籤過多時間隔顯示，避免長區間時X軸擠滿文字
+        step = max(1, -(-len(date_labels) // CHART_MAX_LABELS))
+        ax.set_xticks(x_pos[::step])
+        ax.set_xticklabels(date_labels[::step], rotation=45, ha="right", fontsize=9)
+        ax.set_ylabel("加權後筆數")
+        ax.set_title("工作記錄統計")
+        ax.legend(bbox_to_anchor=(1.01, 1), loc="upper left", prop={"size": 9})
+        ax.grid(axis="y", linestyle="--", alpha=0.3)
+
+        # 總計標籤只在長條數量不多時顯示
+        count = len(date_labels) if len(date_labels) <= CHART_MAX_LABELS else 0
+        self._total_texts = [ax.text(i, 0, "", ha="center", fontsize=8, fontweight="bold") for i in range(count)]
+        self.figure.tight_layout()
+
+    def _update_totals(self, totals):
+        for i, (text, total) in enumerate(zip(self._total_texts, totals)):
+            text.set_visible(total > 0)
+            text.set_position((i, total + 0.1))
+            text.set_text(f"{total:.1f}")
+
+# ==========================================
+# 報告匯出
+# ==========================================
+# 匯出樣式設定（openpyxl 延後載入，實際的樣式物件在第一次匯出時由 _init_report_styles 依這些設定建立）
+REPORT_BODY_FONT_SIZE = 11
+REPORT_HEADER_COLOR = "4472C4"  # 表頭底色
+DATE_TITLE_FONT_SIZE = 14  # 日期區間標題
+SHEET_TITLE_FONT_SIZE = 12  # 各Sheet標題
+REPORT_MAX_COLUMN = 4  # 整個表格使用A-D列，所有標題合併A-D
+REPORT_CHART_ROWS = 22  # 圖表佔用行數，避免和後續內容重疊
+REPORT_COLUMN_WIDTHS = {"A": 12, "B": 15, "C": 30, "D": 80}
+REPORT_DETAIL_HEADER = ["更新日期", "狀態", "作業名稱", "工作內容"]
+
+# 通用樣式（由 _init_report_styles 建立）
+LEFT_TOP_ALIGN = CENTER_ALIGN = HEADER_FONT = HEADER_FILL = BODY_FONT = DATE_TITLE_FONT = SHEET_TITLE_FONT = None
+
+def _init_report_styles():
+    global LEFT_TOP_ALIGN, CENTER_ALIGN, HEADER_FONT, HEADER_FILL, BODY_FONT, DATE_TITLE_FONT, SHEET_TITLE_FONT
+    if LEFT_TOP_ALIGN is not None:
+        return
+    Alignment, Font, PatternFill = _xl_styles.Alignment, _xl_styles.Font, _xl_styles.PatternFill
+    LEFT_TOP_ALIGN = Alignment(horizontal='left', vertical='top', wrap_text=True)
+    CENTER_ALIGN = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    HEADER_FONT = Font(bold=True, color="FFFFFF", name=FONT_NAME, size=REPORT_BODY_FONT_SIZE)
+    HEADER_FILL = PatternFill(start_color=REPORT_HEADER_COLOR, fill_type="solid")
+    BODY_FONT = Font(size=REPORT_BODY_FONT_SIZE, name=FONT_NAME)
+    DATE_TITLE_FONT = Font(bold=True, size=DATE_TITLE_FONT_SIZE, name=FONT_NAME)
+    SHEET_TITLE_FONT = Font(bold=True, size=SHEET_TITLE_FONT_SIZE, name=FONT_NAME)
+
+def render_chart_png(fig):
+    """將圖表輸出為PNG位元組（嵌入Excel用）"""
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format="png", bbox_inches="tight", dpi=150)
+    return img_buffer.getvalue()
+
+class ChartPngCache:
+    """
+    匯出用圖表PNG：每次更新圖表後在背景執行緒以離屏 Agg 畫布產生，依
+    （彙總後資料、Sheet、加權、日期區間）的雜湊保存最近 CHART_PNG_CACHE_SIZE 張
+    匯出時取用已完成的PNG；同一組資料重複匯出不會再重新繪製
+    """
+
+    def __init__(self, size=CHART_PNG_CACHE_SIZE):
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    @staticmethod
+    def make_key(date_labels, sheets, layers, weights, start_text, end_text):
+        digest = hashlib.sha1()
+        digest.update(json.dumps([list(date_labels), list(sheets),
+                                  [weights.get(s) for s in sheets], start_text, end_text],
+                                 ensure_ascii=False).encode("utf-8"))
+        digest.update(np.ascontiguousarray(layers, dtype=float).tobytes())
+        return digest.hexdigest()
+
+    def submit(self, key, date_labels, sheets, layers):
+        """
+        排入背景繪製；已有相同 key 時直接沿用
+        排入新的繪製前先取消其他尚未開始的繪製（已被新資料取代），避免匯出時排在過期的繪製之後
+        """
+        with self.lock:
+            future = self.futures.pop(key, None)
+            if future is not None:
+                self.hits += 1
+            else:
+                for stale_key, stale in list(self.futures.items()):
+                    if stale.cancel():
+                        del self.futures[stale_key]
+                self.renders += 1
+                future = self.executor.submit(self._render, list(date_labels), list(sheets), np.array(layers))
+            # 依使用順序保留最近的幾張
+            self.futures[key] = future
+            while len(self.futures) > self.size:
+                self.futures.pop(next(iter(self.futures))).cancel()
+            return future
+
+    def is_ready(self, key):
+        with self.lock:
+            future = self.futures.get(key)
+            return future is not None and future.done()
+
+    def get(self, key, date_labels, sheets, layers):
+        """取得PNG位元組，尚未繪製完成時等待（匯出於背景執行緒呼叫）"""
+        return self.submit(key, date_labels, sheets, layers).result()
+
+    @staticmethod
+    def _render(date_labels, sheets, layers):
+        chart = StackedBarChart()
+        chart.update(date_labels, sheets, layers)
+        return render_chart_png(chart.figure)
+
+def write_report_excel(save_path, raw_data, export_sheets, start_text, end_text, chart_png,
+                       progress=None, cancel_event=None, engine=None):
+    """
+    產生工作報告Excel：日期區間標題、統計圖表、各Sheet詳細記錄（日期由新到舊）
+    chart_png 為 None 時不插入圖表
+    progress / cancel_event 用法同 read_excel_full_data；取消時不會寫出檔案
+    engine：匯出引擎，未指定時使用 EXPORT_ENGINE
+    """
+    engine = engine or EXPORT_ENGINE
+    if engine == "write_only":
+        writer = _write_report_write_only
+    elif engine == "legacy":
+        writer = _write_report_legacy
+    else:
+        raise ValueError(f"未知的匯出引擎：{engine}")
+    _init_report_styles()
+
+    # 先算好匯出記錄的附註排序（sorted_notes 為延遲計算），排序與寫檔分開計時
+    stats = active_stats()
+    before = cached_smart_sort.cache_info()
+    with stats.stage("附註排序"):
+        exported = 0
+        for sheet_name in export_sheets:
+            for count, item in enumerate(raw_data.get(sheet_name, ()), 1):
+                if count % PROGRESS_ROW_STEP == 0:
+                    check_cancelled(cancel_event)
+                item.sorted_notes
+                exported += 1
+    after = cached_smart_sort.cache_info()
+    stats.count("sort_cache_hits", after.hits - before.hits)
+    stats.count("sort_cache_misses", after.misses - before.misses)
+    stats.count("exported_rows", exported)
+    with stats.stage("寫入Excel"):
+        writer(save_path, raw_data, export_sheets, start_text, end_text, chart_png, progress, cancel_event)
+
+def _write_report_write_only(save_path, raw_data, export_sheets, start_text, end_text, chart_png,
+                             progress, cancel_event):
+    """
+    單次寫入：以 write_only 工作簿逐列串流輸出，字型、對齊、填色在寫入時即為最終樣式，
+    不需再以 format_excel_cells 重新載入與儲存
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("工作匯報")
+    # write_only 模式下欄寬必須在寫入第一列前設定
+    for col, width in REPORT_COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+
+    row_no = 0
+    last_col = _xl_utils.get_column_letter(REPORT_MAX_COLUMN)
+
+    style_templates = {}
+
+    def styled(value, font=BODY_FONT, alignment=LEFT_TOP_ALIGN, fill=None):
+        key = (id(font), id(alignment), id(fill))
+        template = style_templates.get(key)
+        if template is None:
+            template = _xl_cell.WriteOnlyCell(ws)
+            template.font = font
+            template.alignment = alignment
+            if fill is not None:
+                template.fill = fill
+            style_templates[key] = template
+        cell = _xl_cell.WriteOnlyCell(ws, value=value)
+        # 直接複製已登錄的樣式索引，避免每格重新比對字型/對齊物件
+        cell._style = copy.copy(template._style)
+        return cell
+
+    def append(cells=()):
+        nonlocal row_no
+        ws.append(list(cells))
+        row_no += 1
+
+    def append_title(cell):
+        append([cell])
+        ws.merged_cells.add(f"A{row_no}:{last_col}{row_no}")
+
+    # 1. 日期區間標題（合併A-D列）
+    append_title(styled(f"日期區間：{start_text} ~ {end_text}", DATE_TITLE_FONT, CENTER_ALIGN))
+    append()
+
+    # 2. 統計圖表（錨定在下一列，之後保留空列；chart_png 為 None 時不插入圖表）
+    if chart_png is not None:
+        excel_img = _xl_image.Image(io.BytesIO(chart_png))
+        excel_img.width = 850
+        excel_img.height = 400
+        ws.add_image(excel_img, f"A{row_no + 1}")
+        for _ in range(REPORT_CHART_ROWS):
+            append()
+
+    # 3. 詳細工作記錄標題
+    append_title(styled("詳細工作記錄", HEADER_FONT, CENTER_ALIGN, HEADER_FILL))
+    append()
+
+    # 4. 逐個Sheet寫入詳細數據（Sheet與排序同 iter_report_rows：日期由新到舊）
+    for sheet_no, sheet_name, total, rows in iter_report_sheets(raw_data, export_sheets, cancel_event):
+        check_cancelled(cancel_event)
+        if progress:
+            progress(sheet_no, len(export_sheets), f"寫入 {sheet_name}")
+        append_title(styled(f"【{sheet_name}】", SHEET_TITLE_FONT))
+        append([styled(text, HEADER_FONT, CENTER_ALIGN, HEADER_FILL) for text in REPORT_DETAIL_HEADER])
+
+        for count, row in enumerate(rows, 1):
+            if progress and count % PROGRESS_ROW_STEP == 0:
+                progress(None, None, f"{sheet_name}：已寫入 {count}/{total} 筆")
+            append([styled(value) for value in row[1:]])
+        append()
+
+    check_cancelled(cancel_event)
+    if progress:
+        progress(len(export_sheets), len(export_sheets), "儲存檔案")
+    wb.save(save_path)
+
+def _write_report_legacy(save_path, raw_data, export_sheets, start_text, end_text, chart_png,
+                         progress, cancel_event):
+    """先以一般工作簿寫入，儲存後再由 format_excel_cells 重新載入並統一字型與換行"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "工作匯報"
+
+    current_row = 1
+
+    # ==================== 1. 日期區間標題（合併A-D列） ====================
+    date_title = f"日期區間：{start_text} ~ {end_text}"
+    date_title_cell = ws.cell(row=current_row, column=1, value=date_title)
+    date_title_cell.font = DATE_TITLE_FONT
+    # 合併欄位
+    ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=REPORT_MAX_COLUMN)
+    # 設置居中對齊
+    date_title_cell.alignment = CENTER_ALIGN
+    current_row += 2
+
+    # ==================== 2. 插入統計圖表 ====================
+    if chart_png is not None:
+        excel_img = _xl_image.Image(io.BytesIO(chart_png))
+        excel_img.width = 850
+        excel_img.height = 400
+        ws.add_image(excel_img, f"A{current_row}")
+        current_row += REPORT_CHART_ROWS
+
+    # ==================== 3. 詳細工作記錄標題（合併A-D列） ====================
+    detail_title_cell = ws.cell(row=current_row, column=1, value="詳細工作記錄")
+    detail_title_cell.font = HEADER_FONT
+    detail_title_cell.fill = HEADER_FILL
+    # 合併欄位
+    ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=REPORT_MAX_COLUMN)
+    detail_title_cell.alignment = CENTER_ALIGN
+    current_row += 2
+
+    # ==================== 4. 逐個Sheet寫入詳細數據（Sheet與排序同 iter_report_rows） ====================
+    for sheet_no, sheet_name, total, rows in iter_report_sheets(raw_data, export_sheets, cancel_event):
+        check_cancelled(cancel_event)
+        if progress:
+            progress(sheet_no, len(export_sheets), f"寫入 {sheet_name}")
+        # Sheet分標題（合併A-D列）
+        sheet_title_cell = ws.cell(row=current_row, column=1, value=f"【{sheet_name}】")
+        sheet_title_cell.font = SHEET_TITLE_FONT
+        # 合併欄位
+        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=REPORT_MAX_COLUMN)
+        sheet_title_cell.alignment = LEFT_TOP_ALIGN
+        current_row += 1
+
+        # 詳細表格表頭
+        for col_idx, text in enumerate(REPORT_DETAIL_HEADER, 1):
+            cell = ws.cell(row=current_row, column=col_idx, value=text)
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+            cell.alignment = CENTER_ALIGN
+        current_row += 1
+
+        # 寫入逐筆數據（日期、狀態、作業名稱、排序後的工作內容；日期由新到舊）
+        for count, row in enumerate(rows, 1):
+            if progress and count % PROGRESS_ROW_STEP == 0:
+                progress(None, None, f"{sheet_name}：已寫入 {count}/{total} 筆")
+            for col_idx, value in enumerate(row[1:], 1):
+                ws.cell(row=current_row, column=col_idx, value=value).alignment = LEFT_TOP_ALIGN
+
+            current_row += 1
+        # 每個Sheet結束空一行
+        current_row += 1
+
+    # ==================== 調整欄寬 ====================
+    for col, width in REPORT_COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+
+    check_cancelled(cancel_event)
+    if progress:
+        progress(len(export_sheets), len(export_sheets), "儲存檔案")
+    # 先保存原始檔案
+    wb.save(save_path)
+
+    # 自動套用全域格式（11號字、自動換行）
+    format_excel_cells(save_path)
+
+# ==========================================
+# 明細匯出（CSV / JSON Lines / Parquet，逐批串流寫出）
+# ==========================================
+RECORD_EXPORT_HEADER = ["Sheet"] + REPORT_DETAIL_HEADER
+RECORD_EXPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet"}
+
+def iter_report_rows(raw_data, export_sheets, cancel_event=None):
+    """
+    所有匯出格式（Excel / 純文字 / 明細）共用的Sheet選擇與排序規則：依 export_sheets 順序、各Sheet日期由新到舊
+    每列為 (Sheet, 更新日期, 狀態, 作業名稱, 工作內容)，工作內容為 sorted_notes 以換行連接
+    """
+    for sheet_name in export_sheets:
+        if sheet_name not in raw_data:
+            continue
+        items = sorted(raw_data[sheet_name], key=lambda x: x.ordinal, reverse=True)
+        for count, item in enumerate(items, 1):
+            if count % PROGRESS_ROW_STEP == 0:
+                check_cancelled(cancel_event)
+            yield (sheet_name, item.date_text, item.status, item.title, "\n".join(item.notes_uncached()))
+
+def iter_report_sheets(raw_data, export_sheets, cancel_event=None):
+    """iter_report_rows 依Sheet分組：(Sheet序號, Sheet名稱, 筆數, 該Sheet的明細列)，供分Sheet輸出的報告使用"""
+    rows = iter_report_rows(raw_data, export_sheets, cancel_event)
+    for sheet_name, sheet_rows in itertools.groupby(rows, key=lambda row: row[0]):
+        yield export_sheets.index(sheet_name), sheet_name, len(raw_data[sheet_name]), sheet_rows
+
+def _iter_chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _write_records_csv(f_path, chunks):
+    # utf-8-sig：Excel 直接開啟CSV時可正確顯示中文
+    with open(f_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(RECORD_EXPORT_HEADER)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            yield len(chunk)
+
+def _write_records_jsonl(f_path, chunks):
+    with open(f_path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write("".join(json.dumps(dict(zip(RECORD_EXPORT_HEADER, row)), ensure_ascii=False) + "\n"
+                            for row in chunk))
+            yield len(chunk)
+
+def _write_records_parquet(f_path, chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("匯出 Parquet 需要安裝 pyarrow（pip install pyarrow）")
+    schema = pa.schema([(name, pa.string()) for name in RECORD_EXPORT_HEADER])
+    with pq.ParquetWriter(f_path, schema) as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays([pa.array(col, pa.string()) for col in columns], schema=schema))
+            yield len(chunk)
+
+_RECORD_WRITERS = {"csv": _write_records_csv, "jsonl": _write_records_jsonl, "parquet": _write_records_parquet}
+
+def write_report_records(save_path, raw_data, export_sheets, fmt=None, progress=None, cancel_event=None):
+    """
+    匯出明細記錄（不含圖表與樣式），每 RECORD_EXPORT_CHUNK_ROWS 筆寫出一次，記憶體用量不隨筆數增加
+    fmt："csv" / "jsonl" / "parquet"，未指定時依副檔名判斷；回傳寫出筆數
+    取消時刪除未完成的檔案
+    """
+    fmt = fmt or RECORD_EXPORT_FORMATS.get(os.path.splitext(save_path)[1].lower())
+    if fmt not in _RECORD_WRITERS:
+        raise ValueError(f"未知的匯出格式：{save_path}")
+    total = sum(len(raw_data.get(sheet_name, ())) for sheet_name in export_sheets)
+    chunks = _iter_chunks(iter_report_rows(raw_data, export_sheets, cancel_event), RECORD_EXPORT_CHUNK_ROWS)
+    written = 0
+    stats = active_stats()
+    try:
+        with stats.stage("寫入明細"):
+            for n in _RECORD_WRITERS[fmt](save_path, chunks):
+                written += n
+                if progress:
+                    progress(written, total, f"已寫入 {written}/{total} 筆")
+    except OperationCancelled:
+        if os.path.exists(save_path):
+            os.remove(save_path)
+        raise
+    stats.count("exported_rows", written)
+    return written
+
+# ==========================================
+# 批次/命令列模式（不需圖形介面）
+# ==========================================
+def load_app_settings(path=None):
+    """讀取 work_log_config.ini 的 [SETTINGS]；檔案不存在或格式錯誤時回傳預設值"""
+    settings = {"last_file": "", "start_date": "", "end_date": "", "save_dir": "",
+                "output_txt": False, "output_excel": True, "output_chart": True}
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(path or APP_SETTINGS_FILE, encoding="utf-8")
+        if parser.has_section("SETTINGS"):
+            section = parser["SETTINGS"]
+            for key in ("last_file", "start_date", "end_date", "save_dir"):
+                settings[key] = section.get(key, "").strip()
+            for key in ("output_txt", "output_excel", "output_chart"):
+                settings[key] = section.getboolean(key, settings[key])
+    except Exception as e:
+        print(f"設定檔讀取失敗：{e}")
+    return settings
+
+def write_report_text(save_path, raw_data, export_sheets, start_text, end_text):
+    """純文字報告：日期區間、各Sheet詳細記錄（日期由新到舊）"""
+    with open(save_path, "w", encoding="utf-8") as f:
+        f.write(f"日期區間：{start_text} ~ {end_text}\n\n")
+        for _, sheet_name, _, rows in iter_report_sheets(raw_data, export_sheets):
+            f.write(f"【{sheet_name}】\n")
+            for _, date_text, status, title, notes in rows:
+                f.write(f"{date_text}\t{status}\t{title}\n")
+                if notes:
+                    f.write("\t" + notes.replace("\n", "\n\t") + "\n")
+            f.write("\n")
+
+def _batch_parse(file_path):
+    """批次第一階段：解析整份檔案並寫入解析快取，同一檔案只解析一次"""
+    started = time.perf_counter()
+    index, err = load_date_index(file_path)
+    rows = index.row_count if index is not None else 0
+    source = index.source if index is not None else ""
+    return file_path, err, rows, source, time.perf_counter() - started
+
+def _batch_report(file_path, start_text, end_text, settings, weight_config, sheets=None):
+    """
+    批次第二階段：產生一組（檔案, 日期區間）的報告
+    檔案已在第一階段解析，此處由解析快取載入日期索引後切出區間
+    """
+    timings = {}
+    started = time.perf_counter()
+    result = {"file": file_path, "start": start_text, "end": end_text, "outputs": [], "rows": 0,
+              "error": None, "timings": timings}
+    try:
+        index, err = load_date_index(file_path)
+        if err:
+            result["error"] = err
+            return result
+        start_date = datetime.strptime(start_text, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_text, "%Y-%m-%d").date()
+        raw_data = index.query(start_date, end_date)
+        timings["load"] = time.perf_counter() - started
+        if not raw_data:
+            result["error"] = "無有效數據"
+            return result
+        result["rows"] = sum(len(items) for items in raw_data.values())
+        valid_sheets = index.valid_sheets
+        export_sheets = [s for s in (sheets or valid_sheets) if s in raw_data]
+
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        out_dir = settings["save_dir"] or os.path.dirname(os.path.abspath(file_path))
+        base_path = os.path.join(out_dir, f"{stem}_{start_text}_{end_text}_工作報告")
+
+        chart_png = None
+        if settings["output_chart"]:
+            mark = time.perf_counter()
+            weights = {s: clamp_weight(w) for s, w in weight_config.get(os.path.basename(file_path), {}).items()}
+            date_labels, layers = ChartCube(raw_data, valid_sheets).layers(weights, valid_sheets, bucket="auto")
+            chart = StackedBarChart()
+            chart.update(date_labels, valid_sheets, layers)
+            chart_png = render_chart_png(chart.figure)
+            timings["chart"] = time.perf_counter() - mark
+        if settings["output_excel"]:
+            mark = time.perf_counter()
+            write_report_excel(base_path + ".xlsx", raw_data, export_sheets, start_text, end_text, chart_png)
+            result["outputs"].append(base_path + ".xlsx")
+            timings["excel"] = time.perf_counter() - mark
+        if settings["output_txt"]:
+            mark = time.perf_counter()
+            write_report_text(base_path + ".txt", raw_data, export_sheets, start_text, end_text)
+            result["outputs"].append(base_path + ".txt")
+            timings["txt"] = time.perf_counter() - mark
+        for fmt in settings.get("record_formats", ()):
+            mark = time.perf_counter()
+            write_report_records(f"{base_path}.{fmt}", raw_data, export_sheets, fmt)
+            result["outputs"].append(f"{base_path}.{fmt}")
+            timings[fmt] = time.perf_counter() - mark
+    except Exception as e:
+        result["error"] = str(e)
+    timings["total"] = time.perf_counter() - started
+    return result
+
+def run_batch(files, ranges, settings=None, sheets=None, workers=None, log=print):
+    """
+    無介面批次產生報告：每個（檔案, 日期區間）輸出一份報告
+    第一階段各檔案平行解析一次（結果寫入解析快取），第二階段所有組合平行輸出
+    回傳 (各組合結果清單, 解析結果清單)
+    """
+    settings = settings or load_app_settings()
+    weight_config = load_weight_config()
+    workers = workers or BATCH_WORKERS or os.cpu_count() or 1
+    if settings["save_dir"]:
+        os.makedirs(settings["save_dir"], exist_ok=True)
+    files = list(dict.fromkeys(files))
+
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(files), 1))) as pool:
+        parsed = list(pool.map(_batch_parse, files))
+    for file_path, err, rows, source, seconds in parsed:
+        log(f"解析 {file_path}：{err or f'{rows} 筆（{source}）'}，{seconds:.2f} 秒")
+    ready = [p[0] for p in parsed if not p[1]]
+
+    jobs = [(f, start, end) for f in ready for start, end in ranges]
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(jobs), 1))) as pool:
+        futures = [pool.submit(_batch_report, f, start, end, settings, weight_config, sheets)
+                   for f, start, end in jobs]
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            status = result["error"] or ", ".join(result["outputs"]) or "（未設定輸出項目）"
+            log(f"{os.path.basename(result['file'])} {result['start']} ~ {result['end']}："
+                f"{result['rows']} 筆 → {status}")
+    return results, parsed
+
+def format_batch_summary(results, parsed, elapsed):
+    """批次耗時摘要：各階段秒數合計與每份報告的耗時"""
+    lines = ["", "==== 批次耗時摘要 ===="]
+    lines.append(f"解析 {len(parsed)} 個檔案：{sum(p[4] for p in parsed):.2f} 秒（各子程序合計）")
+    for stage in ("load", "chart", "excel", "txt", "csv", "jsonl", "parquet"):
+        seconds = [r["timings"][stage] for r in results if stage in r["timings"]]
+        if seconds:
+            lines.append(f"{stage:<6} {len(seconds)} 次，合計 {sum(seconds):.2f} 秒，最長 {max(seconds):.2f} 秒")
+    failed = sum(1 for r in results if r["error"])
+    lines.append(f"報告 {len(results) - failed} 份成功、{failed} 份失敗，總耗時 {elapsed:.2f} 秒")
+    return "\n".join(lines)
+
+def _parse_range(text):
+    try:
+        start_text, end_text = [part.strip() for part in text.split("~")]
+        for part in (start_text, end_text):
+            datetime.strptime(part, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期區間格式錯誤：{text}（應為 YYYY-MM-DD~YYYY-MM-DD）")
+    return start_text, end_text
+
+def run_batch_cli(argv=None):
+    """
+    命令列入口，例如：
+    python main.py --batch a.xlsx b.xlsx -r 2026-02-01~2026-02-15 -r 2026-02-16~2026-02-28
+    未指定的檔案、日期區間、輸出資料夾沿用 work_log_config.ini
+    """
+    parser = argparse.ArgumentParser(description="工時記錄報告批次產生")
+    parser.add_argument("--batch", action="store_true", help="以批次模式執行（不開啟視窗）")
+    parser.add_argument("files", nargs="*", help="Excel檔案（預設為設定檔的 last_file）")
+    parser.add_argument("-r", "--range", dest="ranges", action="append", type=_parse_range,
+                        help="日期區間 YYYY-MM-DD~YYYY-MM-DD，可指定多次（預設為設定檔的日期）")
+    parser.add_argument("-o", "--out-dir", help="輸出資料夾（預設為設定檔的 save_dir，未設定時與來源檔案同資料夾）")
+    parser.add_argument("-s", "--sheet", dest="sheets", action="append", help="只匯出指定Sheet，可指定多次")
+    parser.add_argument("-w", "--workers", type=int, help="子程序數量")
+    parser.add_argument("--records", action="append", choices=sorted(_RECORD_WRITERS),
+                        help="另外匯出明細記錄（csv / jsonl / parquet），可指定多次")
+    parser.add_argument("--config", help=f"設定檔路徑（預設 {APP_SETTINGS_FILE}）")
+    parser.add_argument("--profile", action="store_true", help=f"以 cProfile 分析本次執行（輸出到 {PROFILE_DIR}）")
+    args = parser.parse_args(argv)
+
+    settings = load_app_settings(args.config)
+    settings["record_formats"] = args.records or []
+    if args.out_dir:
+        settings["save_dir"] = args.out_dir
+    files = args.files or ([settings["last_file"]] if settings["last_file"] else [])
+    ranges = args.ranges or ([(settings["start_date"], settings["end_date"])]
+                             if settings["start_date"] and settings["end_date"] else [])
+    if not files or not ranges:
+        parser.error("請指定檔案與日期區間（或在設定檔中設定 last_file / start_date / end_date）")
+
+    started = time.perf_counter()
+    if args.profile:
+        (results, parsed), profile_path = run_profiled(
+            lambda: run_batch(files, ranges, settings, args.sheets, args.workers), "batch")
+        print(f"cProfile 已輸出：{profile_path}（子程序內的時間不包含在內）")
+    else:
+        results, parsed = run_batch(files, ranges, settings, args.sheets, args.workers)
+    print(format_batch_summary(results, parsed, time.perf_counter() - started))
+    failed = any(p[1] for p in parsed) or any(r["error"] for r in results)
+    return 1 if failed else 0
 
 # ==========================================
 # 主介面
@@ -266,24 +2375,45 @@ class WorkReportExcelApp:
         self.root.title("工時記錄工具")
         self.root.geometry(WINDOW_SIZE)
         
-        # ==================== 新增：設置視窗圖標 ====================
-        self.set_window_icon()
-        
         self.weight_config = load_weight_config()
         self.raw_data = {}
         self.valid_sheets = []
+        self.date_index = None
         self.current_file_name = ""
         self.sheet_export_vars = {}
         self.sheet_weight_vars = {}
         self.current_chart_fig = None
-        
-        # 通用樣式預定義
-        self.LEFT_TOP_ALIGN = Alignment(horizontal='left', vertical='top', wrap_text=True)
-        self.CENTER_ALIGN = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        self.HEADER_FONT = Font(bold=True, color="FFFFFF", name=FONT_NAME, size=11)
-        self.HEADER_FILL = PatternFill(start_color="4472C4", fill_type="solid")
+        self.chart_cube = None
+        self.chart = None
+        self.chart_png_cache = ChartPngCache()
+        self.chart_png_request = None
+        # 背景工作（讀取/匯出）狀態
+        self.job_queue = None
+        self.cancel_event = None
+        # 資料夾模式：輪詢檔案變更，只重新解析有變動的檔案
+        self.folder_watcher = None
+        self.folder_poll_id = None
+        self.loaded_range = None
+        self.busy = False
+        self.last_stats = {}
         
         self.setup_ui()
+        self.ui_ready_at = time.perf_counter()
+        # 視窗第一次繪製完成、進入閒置時記錄啟動時間；圖標在之後才載入，不延遲視窗出現
+        self.root.after_idle(self.report_startup)
+        # ==================== 新增：設置視窗圖標 ====================
+        self.root.after_idle(self.set_window_icon)
+
+    def report_startup(self):
+        """記錄啟動各階段耗時（模組載入、建立介面、第一次繪製），寫入統計記錄並顯示於統計區"""
+        now = time.perf_counter()
+        stats = RunStats("啟動")
+        stats.stages["載入模組"] = STARTUP_IMPORTED - STARTUP_T0
+        stats.stages["建立介面"] = self.ui_ready_at - STARTUP_IMPORTED
+        stats.stages["第一次繪製"] = now - self.ui_ready_at
+        stats.elapsed = now - STARTUP_T0
+        self.record_stats(stats)
+        print(f"啟動時間：{stats.elapsed * 1000:.0f} ms（目標 {STARTUP_TARGET_MS} ms 內）")
     
     def set_window_icon(self):
         """設置視窗圖標，兼容不同作業系統，並處理圖標不存在的情況"""
@@ -309,7 +2439,10 @@ class WorkReportExcelApp:
         ttk.Label(row1, text="Excel：", font=(FONT_NAME, 10)).pack(side=tk.LEFT)
         self.entry_file = ttk.Entry(row1, width=50)
         self.entry_file.pack(side=tk.LEFT, padx=5)
-        ttk.Button(row1, text="瀏覽", command=self.browse_file).pack(side=tk.LEFT)
+        self.btn_browse = ttk.Button(row1, text="瀏覽", command=self.browse_file)
+        self.btn_browse.pack(side=tk.LEFT)
+        self.btn_folder = ttk.Button(row1, text="資料夾", command=self.browse_folder)
+        self.btn_folder.pack(side=tk.LEFT, padx=5)
 
         # 2. 第二行：日期 + 讀取
         row2 = ttk.Frame(self.root, padding=8)
@@ -324,7 +2457,11 @@ class WorkReportExcelApp:
         self.entry_end.pack(side=tk.LEFT, padx=3)
         self.entry_end.insert(0, datetime.now().date().strftime("%Y-%m-%d"))
 
-        ttk.Button(row2, text="讀取", command=self.load_data, style="Accent.TButton").pack(side=tk.LEFT, padx=15)
+        self.btn_load = ttk.Button(row2, text="讀取", command=self.load_data, style="Accent.TButton")
+        self.btn_load.pack(side=tk.LEFT, padx=15)
+        # 勾選時讀取結果寫入歷史資料庫，檔案未變更時日期區間、圖表與匯出直接查詢資料庫
+        self.use_store_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(row2, text="歷史資料庫", variable=self.use_store_var).pack(side=tk.LEFT)
 
         # 3. 第三行：Sheet設置
         self.row3 = ttk.LabelFrame(self.root, text="Sheet 勾選（匯出詳細資料）& 加權（輸入整數，自動除以10）", padding=8)
@@ -334,8 +2471,36 @@ class WorkReportExcelApp:
         # 4. 第四行：按鈕
         row4 = ttk.Frame(self.root, padding=5)
         row4.pack(fill=tk.X)
-        ttk.Button(row4, text="更新圖表", command=self.update_chart).pack(side=tk.LEFT, padx=10)
-        ttk.Button(row4, text="匯出Excel", command=self.export_excel, style="Accent.TButton").pack(side=tk.RIGHT, padx=10)
+        self.btn_chart = ttk.Button(row4, text="更新圖表", command=self.update_chart)
+        self.btn_chart.pack(side=tk.LEFT, padx=10)
+        ttk.Label(row4, text="彙總：").pack(side=tk.LEFT)
+        self.bucket_var = tk.StringVar(value="自動")
+        bucket_box = ttk.Combobox(row4, textvariable=self.bucket_var, values=list(CHART_BUCKET_CHOICES),
+                                  state="readonly", width=5)
+        bucket_box.pack(side=tk.LEFT)
+        bucket_box.bind("<<ComboboxSelected>>", lambda e: self.update_chart())
+        self.btn_export = ttk.Button(row4, text="匯出Excel", command=self.export_excel, style="Accent.TButton")
+        self.btn_export.pack(side=tk.RIGHT, padx=10)
+        self.btn_export_records = ttk.Button(row4, text="匯出明細", command=self.export_records)
+        self.btn_export_records.pack(side=tk.RIGHT)
+
+        # 進度列：背景讀取/匯出時顯示進度，可取消
+        row5 = ttk.Frame(self.root, padding=(8, 0))
+        row5.pack(fill=tk.X)
+        self.progress_bar = ttk.Progressbar(row5, mode="determinate", length=300)
+        self.progress_bar.pack(side=tk.LEFT)
+        self.btn_cancel = ttk.Button(row5, text="取消", command=self.cancel_job, state=tk.DISABLED)
+        self.btn_cancel.pack(side=tk.LEFT, padx=8)
+        self.progress_label = ttk.Label(row5, text="", foreground="gray")
+        self.progress_label.pack(side=tk.LEFT)
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(row5, text="下次執行以 cProfile 分析", variable=self.profile_var).pack(side=tk.RIGHT, padx=8)
+
+        # 最近一次執行統計：各階段耗時、列數、快取命中（同時寫入 run_stats.jsonl）
+        row6 = ttk.LabelFrame(self.root, text="最近一次執行統計", padding=(8, 2))
+        row6.pack(fill=tk.X, padx=8)
+        self.stats_label = ttk.Label(row6, text="尚無記錄", foreground="gray", font=(FONT_NAME, 8), justify=tk.LEFT)
+        self.stats_label.pack(anchor=tk.W)
 
         # 5. 圖表區
         self.chart_frame = ttk.Frame(self.root, padding=8)
@@ -348,6 +2513,98 @@ class WorkReportExcelApp:
             self.entry_file.insert(0, path)
             self.current_file_name = os.path.basename(path)
 
+    def browse_folder(self):
+        path = filedialog.askdirectory()
+        if path:
+            self.entry_file.delete(0, tk.END)
+            self.entry_file.insert(0, path)
+            # 加權配置以資料夾名稱為鍵，Sheet名稱為「檔名/Sheet」
+            self.current_file_name = os.path.basename(os.path.normpath(path))
+
+    # ==================== 背景工作 ====================
+    def run_job(self, title, job, on_done, stats_name=None):
+        """
+        在背景執行緒執行 job(progress, cancel_event)，Tk 主執行緒以 root.after 輪詢結果，
+        完成後於主執行緒呼叫 on_done(結果)；執行期間停用按鈕
+        執行期間啟用 RunStats（名稱為 stats_name），結束後寫入記錄檔並顯示於統計區；
+        勾選 cProfile 時本次執行會輸出 .prof 檔
+        """
+        self.job_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        job_queue = self.job_queue
+        cancel_event = self.cancel_event
+        stats = RunStats(stats_name or title.rstrip("."))
+        profile = self.profile_var.get()
+        self.profile_var.set(False)
+
+        def progress(done, total, message):
+            job_queue.put(("progress", (done, total, message)))
+
+        def worker():
+            try:
+                with stats.activate():
+                    if profile:
+                        result, stats.profile_path = run_profiled(lambda: job(progress, cancel_event), stats.name)
+                    else:
+                        result = job(progress, cancel_event)
+                job_queue.put(("done", result))
+            except OperationCancelled:
+                stats.error = CANCELLED_MSG
+                job_queue.put(("cancelled", None))
+            except Exception as e:
+                stats.error = str(e)
+                job_queue.put(("error", e))
+
+        self.set_busy(True, title)
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(JOB_POLL_MS, lambda: self.poll_job(on_done, stats))
+
+    def record_stats(self, stats):
+        """寫入統計記錄檔，並更新「最近一次執行統計」（每種執行各保留最近一次）"""
+        append_run_log(stats)
+        self.last_stats[stats.name] = stats.summary_lines()
+        self.stats_label.config(text="\n".join(line for lines in self.last_stats.values() for line in lines))
+
+    def poll_job(self, on_done, stats=None):
+        try:
+            while True:
+                kind, payload = self.job_queue.get_nowait()
+                if kind == "progress":
+                    done, total, message = payload
+                    if total:
+                        self.progress_bar["maximum"] = total
+                        self.progress_bar["value"] = done
+                    self.progress_label.config(text=message)
+                    continue
+                self.set_busy(False)
+                if stats is not None:
+                    self.record_stats(stats)
+                if kind == "done":
+                    on_done(payload)
+                elif kind == "cancelled":
+                    self.progress_label.config(text=CANCELLED_MSG)
+                else:
+                    messagebox.showerror("失敗", str(payload))
+                return
+        except queue.Empty:
+            pass
+        self.root.after(JOB_POLL_MS, lambda: self.poll_job(on_done, stats))
+
+    def cancel_job(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.progress_label.config(text="取消中...")
+
+    def set_busy(self, busy, title=""):
+        self.busy = busy
+        state = tk.DISABLED if busy else tk.NORMAL
+        for button in (self.btn_browse, self.btn_folder, self.btn_load, self.btn_chart, self.btn_export,
+                       self.btn_export_records):
+            button.config(state=state)
+        self.btn_cancel.config(state=tk.NORMAL if busy else tk.DISABLED)
+        self.progress_bar["value"] = 0
+        self.progress_label.config(text=title)
+
     def load_data(self):
         file_path = self.entry_file.get().strip()
         if not file_path:
@@ -360,14 +2617,187 @@ class WorkReportExcelApp:
             messagebox.showerror("錯誤", "日期格式錯誤")
             return
 
-        self.raw_data, self.valid_sheets, err = read_excel_full_data(file_path, start_date, end_date)
-        if err:
-            messagebox.showerror("失敗", err)
+        if self.use_store_var.get() and not os.path.isdir(file_path):
+            self.folder_watcher = None
+            self.load_from_store(file_path, start_date, end_date)
+            return
+
+        # 同一檔案且未變更時直接使用日期索引，不重新讀取Excel（區間切片與圖表立方體仍在背景建立）
+        if self.date_index is not None and self.date_index.is_current(file_path):
+            index = self.date_index
+            self.run_job("切換日期區間...", lambda progress, cancel_event: query_range(index, start_date, end_date),
+                         lambda selection: self.show_loaded_range(start_date, end_date, selection), "切換日期區間")
+            return
+
+        if os.path.isdir(file_path):
+            self.load_folder(file_path, start_date, end_date)
             return
+        self.folder_watcher = None
+
+        # 資料夾模式的 FolderDateIndex 不能作為單一檔案增量解析的舊索引
+        previous = self.date_index if isinstance(self.date_index, WorkbookDateIndex) else None
+
+        def job(progress, cancel_event):
+            index, err = load_date_index(file_path, previous=previous, progress=progress, cancel_event=cancel_event)
+            if err:
+                return None, err
+            return (index, query_range(index, start_date, end_date)), None
+
+        def on_done(result):
+            payload, err = result
+            if err == CANCELLED_MSG:
+                self.progress_label.config(text=CANCELLED_MSG)
+                return
+            if err:
+                messagebox.showerror("失敗", err)
+                return
+            index, selection = payload
+            self.date_index = index
+            self.show_loaded_range(start_date, end_date, selection, index)
+
+        self.run_job("讀取中...", job, on_done, "讀取")
 
-        self.generate_sheet_panel()
+    def load_from_store(self, file_path, start_date, end_date):
+        """
+        歷史資料庫模式：檔案未變更時直接查詢資料庫（不讀取Excel）；
+        否則先讀取檔案建立日期索引並寫入資料庫。圖表筆數以資料庫分組統計建立，匯出記錄也來自資料庫
+        """
+        # 資料夾模式的 FolderDateIndex 不能作為單一檔案增量解析的舊索引
+        previous = self.date_index if isinstance(self.date_index, WorkbookDateIndex) else None
+
+        def job(progress, cancel_event):
+            store = HistoryStore()
+            stats = active_stats()
+            index = None
+            if not store.is_current(file_path):
+                index, err = load_date_index(file_path, previous=previous, progress=progress, cancel_event=cancel_event)
+                if err:
+                    return None, err
+                progress(0, 0, "寫入歷史資料庫...")
+                with stats.stage("寫入歷史資料庫"):
+                    stats.count("store_rows_written", store.ingest(file_path, index))
+            progress(0, 0, "查詢歷史資料庫...")
+            with stats.stage("查詢歷史資料庫"):
+                valid_sheets = store.sheets(file_path)
+                raw_data = store.query(start_date, end_date, file_path=file_path)
+                grouped = store.group_counts(("date", "sheet", "status"), start_date, end_date, file_path=file_path)
+            with stats.stage("建立圖表立方體"):
+                chart_cube = ChartCube.from_counts(grouped, valid_sheets)
+            return (index, raw_data, valid_sheets, chart_cube), None
+
+        def on_done(result):
+            payload, err = result
+            if err == CANCELLED_MSG:
+                self.progress_label.config(text=CANCELLED_MSG)
+                return
+            if err:
+                messagebox.showerror("失敗", err)
+                return
+            index, raw_data, valid_sheets, chart_cube = payload
+            if index is not None:
+                self.date_index = index
+            range_rows = sum(len(items) for items in raw_data.values())
+            source = "讀取檔案後寫入資料庫" if index is not None else "資料庫"
+            self.apply_range(start_date, end_date, raw_data, valid_sheets, chart_cube,
+                             f"載入 {len(valid_sheets)} 個Sheet，區間內 {range_rows} 筆（{source}）")
+
+        self.run_job("讀取中...", job, on_done, "讀取（歷史資料庫）")
+
+    def load_folder(self, folder, start_date, end_date):
+        """資料夾模式：合併資料夾內所有Excel；沿用同一資料夾的舊索引時只解析變更的檔案"""
+        if isinstance(self.date_index, FolderDateIndex) and self.date_index.folder == os.path.abspath(folder):
+            folder_index = self.date_index
+        else:
+            folder_index = FolderDateIndex(folder)
+            self.current_file_name = os.path.basename(os.path.normpath(folder))
+
+        def job(progress, cancel_event):
+            folder_index.scan(progress=progress, cancel_event=cancel_event)
+            return folder_index, query_range(folder_index, start_date, end_date)
+
+        def on_done(result):
+            index, selection = result
+            if not index.indexes:
+                messagebox.showerror("失敗", "資料夾內沒有可讀取的Excel")
+                return
+            self.date_index = index
+            self.show_loaded_range(start_date, end_date, selection, index)
+            if index.errors:
+                messagebox.showwarning("提示", "以下檔案讀取失敗：\n" + "\n".join(
+                    f"{os.path.basename(p)}：{err}" for p, err in index.errors.items()))
+            if self.folder_watcher is None or self.folder_watcher.folder != index.folder:
+                self.folder_watcher = FolderWatcher(folder)
+                if self.folder_poll_id is not None:
+                    self.root.after_cancel(self.folder_poll_id)
+                self.folder_poll_id = self.root.after(FOLDER_POLL_MS, self.poll_folder)
+
+        self.run_job("讀取資料夾中...", job, on_done, "讀取資料夾")
+
+    def poll_folder(self):
+        """定時檢查資料夾檔案大小/修改時間；有變更且沒有其他背景工作時重新掃描並更新圖表"""
+        self.folder_poll_id = None
+        watcher = self.folder_watcher
+        if watcher is None or not isinstance(self.date_index, FolderDateIndex):
+            return
+        if not self.busy and watcher.changes() and self.loaded_range is not None:
+            folder_index = self.date_index
+            start_date, end_date = self.loaded_range
+
+            def job(progress, cancel_event):
+                folder_index.scan(progress=progress, cancel_event=cancel_event)
+                return folder_index, query_range(folder_index, start_date, end_date)
+
+            def on_done(result):
+                index, selection = result
+                self.show_loaded_range(start_date, end_date, selection, index, notify=False)
+                self.progress_label.config(text=f"資料夾已更新（重新解析 {index.parsed_rows} 筆）")
+
+            self.run_job("偵測到檔案變更，更新中...", job, on_done, "資料夾更新")
+        self.folder_poll_id = self.root.after(FOLDER_POLL_MS, self.poll_folder)
+
+    def show_loaded_range(self, start_date, end_date, selection, loaded_index=None, notify=True):
+        """
+        以背景工作中 query_range 取得的 (raw_data, valid_sheets, chart_cube) 更新畫面；loaded_index 為本次剛讀取的索引
+        notify=False 時（資料夾自動更新）不跳出訊息，Sheet組成不變時保留勾選與加權
+        """
+        disk_rows = 0
+        cache_rows = 0
+        if loaded_index is not None:
+            if loaded_index.source == "cache":
+                cache_rows = loaded_index.row_count
+            else:
+                # 增量解析時只計入新增的列，其餘沿用舊索引/快取
+                disk_rows = loaded_index.parsed_rows
+                cache_rows = loaded_index.row_count - loaded_index.parsed_rows
+
+        raw_data, valid_sheets, chart_cube = selection
+        range_rows = sum(len(items) for items in raw_data.values())
+        index_rows = range_rows if loaded_index is None else 0
+        message = None
+        if notify:
+            message = (f"載入 {len(valid_sheets)} 個Sheet，區間內 {range_rows} 筆\n"
+                       f"（索引 {index_rows} 筆／快取或沿用 {cache_rows} 筆／讀取檔案 {disk_rows} 筆）")
+        self.apply_range(start_date, end_date, raw_data, valid_sheets, chart_cube, message)
+
+    def apply_range(self, start_date, end_date, raw_data, valid_sheets, chart_cube, message=None):
+        """
+        套用日期區間的資料並更新畫面；chart_cube 由背景工作預先建立（Tk 主執行緒不逐筆走訪記錄）
+        message 為 None 時（資料夾自動更新）不跳出訊息，Sheet組成不變時保留勾選與加權
+        """
+        if not raw_data:
+            messagebox.showerror("失敗", "無有效數據")
+            return
+        sheets_changed = self.valid_sheets != valid_sheets
+        self.raw_data = raw_data
+        self.valid_sheets = valid_sheets
+        self.loaded_range = (start_date, end_date)
+        self.chart_cube = chart_cube
+
+        if message is not None or sheets_changed:
+            self.generate_sheet_panel()
         self.update_chart()
-        messagebox.showinfo("成功", f"載入 {len(self.valid_sheets)} 個Sheet")
+        if message is not None:
+            messagebox.showinfo("成功", message)
 
     def generate_sheet_panel(self):
         for widget in self.row3.winfo_children():
@@ -414,11 +2844,10 @@ class WorkReportExcelApp:
             try:
                 input_int = int(v.get())
                 real_weight = input_int / 10.0
-                w_dict[s] = real_weight if real_weight >= 0 else 0.1
-                save_config[s] = real_weight
             except:
-                w_dict[s] = 0.1
-                save_config[s] = 0.1
+                real_weight = 0.1
+            w_dict[s] = clamp_weight(real_weight)
+            save_config[s] = real_weight
         
         if self.current_file_name:
             if self.current_file_name not in self.weight_config:
@@ -431,64 +2860,42 @@ class WorkReportExcelApp:
     def get_export_sheets(self):
         return [s for s, v in self.sheet_export_vars.items() if v.get()]
 
+    def record_draw_stats(self, stats, draw_started):
+        """閒置重繪完成後補上「圖表繪製」耗時再寫入統計"""
+        if draw_started:
+            seconds = time.perf_counter() - draw_started[0]
+            stats.stages["圖表繪製"] = seconds
+            stats.elapsed += seconds
+        self.record_stats(stats)
+
     def update_chart(self):
-        if not self.raw_data:
+        if not self.raw_data or self.chart_cube is None:
             return
         selected = self.valid_sheets
         weights = self.get_weight_dict()
 
-        date_sheet_count = {}
-        all_dates = set()
-        for sheet in selected:
-            if sheet not in self.raw_data:
-                continue
-            for item in self.raw_data[sheet]:
-                d = item["更新日期"]
-                all_dates.add(d)
-                if d not in date_sheet_count:
-                    date_sheet_count[d] = {}
-                if sheet not in date_sheet_count[d]:
-                    date_sheet_count[d][sheet] = 0
-                date_sheet_count[d][sheet] += 1
-
-        sorted_dates = sorted(list(all_dates), key=lambda x: datetime.strptime(x, "%Y-%m-%d"), reverse=True)
-        
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-
-        plt.rcParams["font.sans-serif"] = [FONT_NAME, "SimHei"]
-        plt.rcParams["axes.unicode_minus"] = False
-        fig, ax = plt.subplots(figsize=(9, 4), dpi=120)
-        
-        x_pos = range(len(sorted_dates))
-        bottom = [0] * len(sorted_dates)
-        colors = plt.cm.tab10.colors
-
-        for i, sheet in enumerate(selected):
-            counts = []
-            for d in sorted_dates:
-                raw = date_sheet_count.get(d, {}).get(sheet, 0)
-                counts.append(raw * weights.get(sheet, 0.1))
-            ax.bar(x_pos, counts, bottom=bottom, label=sheet, color=colors[i % len(colors)])
-            bottom = [bottom[j] + counts[j] for j in range(len(sorted_dates))]
-
-        ax.set_xticks(x_pos)
-        ax.set_xticklabels(sorted_dates, rotation=45, ha="right", fontsize=9)
-        ax.set_ylabel("加權後筆數")
-        ax.set_title("工作記錄統計")
-        ax.legend(bbox_to_anchor=(1.01, 1), loc="upper left", prop={"size": 9})
-        ax.grid(axis="y", linestyle="--", alpha=0.3)
-
-        for i, total in enumerate(bottom):
-            if total > 0:
-                ax.text(i, total + 0.1, f"{total:.1f}", ha="center", fontsize=8, fontweight="bold")
-
-        plt.tight_layout()
-        self.current_chart_fig = fig
+        # 加權由立方體以矩陣運算取得；圖表沿用同一個 Figure，只更新變動的部分
+        stats = RunStats("更新圖表")
+        with stats.activate():
+            bucket = CHART_BUCKET_CHOICES.get(self.bucket_var.get(), "auto")
+            with stats.stage("圖表彙總"):
+                date_labels, layers = self.chart_cube.layers(weights, selected, bucket=bucket)
+            stats.count("chart_buckets", len(date_labels))
+            with stats.stage("圖表更新"):
+                if self.chart is None:
+                    self.chart = StackedBarChart(self.chart_frame)
+                # 實際重繪由 draw_idle 延後到閒置時執行：在它前後各排一個閒置回呼量測重繪時間
+                draw_started = []
+                self.root.after_idle(lambda: draw_started.append(time.perf_counter()))
+                self.chart.update(date_labels, selected, layers)
+        self.root.after_idle(lambda: self.record_draw_stats(stats, draw_started))
+        self.current_chart_fig = self.chart.figure
 
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # 匯出圖片在背景以離屏畫布預先產生，匯出時直接取用
+        key = ChartPngCache.make_key(date_labels, selected, layers, weights,
+                                     self.entry_start.get(), self.entry_end.get())
+        self.chart_png_request = (key, date_labels, selected, layers)
+        self.chart_png_cache.submit(*self.chart_png_request)
 
     def export_excel(self):
         if not self.raw_data or self.current_chart_fig is None:
@@ -506,102 +2913,75 @@ class WorkReportExcelApp:
         if not save_path:
             return
 
-        try:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "工作匯報"
-
-            current_row = 1
-            MAX_COLUMN = 4  # 整個表格使用A-D列，所有標題合併A-D
-
-            # ==================== 1. 日期區間標題（合併A-D列） ====================
-            date_title = f"日期區間：{self.entry_start.get()} ~ {self.entry_end.get()}"
-            date_title_cell = ws.cell(row=current_row, column=1, value=date_title)
-            date_title_cell.font = Font(bold=True, size=14, name=FONT_NAME)
-            # 合併欄位
-            ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=MAX_COLUMN)
-            # 設置居中對齊
-            date_title_cell.alignment = self.CENTER_ALIGN
-            current_row += 2
-
-            # ==================== 2. 插入統計圖表 ====================
-            img_buffer = io.BytesIO()
-            self.current_chart_fig.savefig(img_buffer, format="png", bbox_inches="tight", dpi=150)
-            img_buffer.seek(0)
-            excel_img = ExcelImage(img_buffer)
-            excel_img.width = 850
-            excel_img.height = 400
-            ws.add_image(excel_img, f"A{current_row}")
-            current_row += 22  # 圖表佔用行數，避免和後續內容重疊
-
-            # ==================== 3. 詳細工作記錄標題（合併A-D列） ====================
-            detail_title_cell = ws.cell(row=current_row, column=1, value="詳細工作記錄")
-            detail_title_cell.font = self.HEADER_FONT
-            detail_title_cell.fill = self.HEADER_FILL
-            # 合併欄位
-            ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=MAX_COLUMN)
-            detail_title_cell.alignment = self.CENTER_ALIGN
-            current_row += 2
-
-            # ==================== 4. 逐個Sheet寫入詳細數據 ====================
-            for sheet_name in export_sheets:
-                if sheet_name not in self.raw_data:
-                    continue
-                # Sheet分標題（合併A-D列）
-                sheet_title_cell = ws.cell(row=current_row, column=1, value=f"【{sheet_name}】")
-                sheet_title_cell.font = Font(bold=True, size=12, name=FONT_NAME)
-                # 合併欄位
-                ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=MAX_COLUMN)
-                sheet_title_cell.alignment = self.LEFT_TOP_ALIGN
-                current_row += 1
+        start_text = self.entry_start.get()
+        end_text = self.entry_end.get()
+        raw_data = self.raw_data
+        chart_png_cache = self.chart_png_cache
+        chart_png_request = self.chart_png_request
 
-                # 詳細表格表頭
-                header_text = ["更新日期", "狀態", "作業名稱", "工作內容"]
-                for col_idx, text in enumerate(header_text, 1):
-                    cell = ws.cell(row=current_row, column=col_idx, value=text)
-                    cell.font = self.HEADER_FONT
-                    cell.fill = self.HEADER_FILL
-                    cell.alignment = self.CENTER_ALIGN
-                current_row += 1
+        def job(progress, cancel_event):
+            # 使用更新圖表時已在背景產生的PNG；尚未完成時在此等待，不佔用主執行緒
+            progress(0, 0, "準備圖表...")
+            stats = active_stats()
+            with stats.stage("等待圖表PNG"):
+                stats.count("chart_png_ready", int(chart_png_cache.is_ready(chart_png_request[0])))
+                chart_png = chart_png_cache.get(*chart_png_request)
+            write_report_excel(save_path, raw_data, export_sheets, start_text, end_text, chart_png,
+                               progress, cancel_event)
+            return save_path
 
-                # 寫入逐筆數據（日期由新到舊排序）
-                items = sorted(self.raw_data[sheet_name], key=lambda x: x["原始日期物件"], reverse=True)
-                for item in items:
-                    # 日期
-                    cell_date = ws.cell(row=current_row, column=1, value=item["更新日期"])
-                    cell_date.alignment = self.LEFT_TOP_ALIGN
-                    # 狀態
-                    cell_status = ws.cell(row=current_row, column=2, value=item["狀態"])
-                    cell_status.alignment = self.LEFT_TOP_ALIGN
-                    # 作業名稱
-                    cell_title = ws.cell(row=current_row, column=3, value=item["作業名稱"])
-                    cell_title.alignment = self.LEFT_TOP_ALIGN
-                    # 排序後的工作內容
-                    sorted_content = "\n".join(item["sorted_notes"])
-                    cell_content = ws.cell(row=current_row, column=4, value=sorted_content)
-                    cell_content.alignment = self.LEFT_TOP_ALIGN
-
-                    current_row += 1
-                # 每個Sheet結束空一行
-                current_row += 1
+        def on_done(path):
+            self.progress_label.config(text="")
+            messagebox.showinfo("成功", f"已保存並自動格式化：\n{path}")
 
-            # ==================== 調整欄寬 ====================
-            ws.column_dimensions["A"].width = 12
-            ws.column_dimensions["B"].width = 15
-            ws.column_dimensions["C"].width = 30
-            ws.column_dimensions["D"].width = 80
+        self.run_job("匯出中...", job, on_done, "匯出")
 
-            # 先保存原始檔案
-            wb.save(save_path)
-            
-            # 自動套用全域格式（11號字、自動換行）
-            format_excel_cells(save_path)
-            
-            messagebox.showinfo("成功", f"已保存並自動格式化：\n{save_path}")
-        except Exception as e:
-            messagebox.showerror("失敗", str(e))
+    def export_records(self):
+        """匯出勾選Sheet的明細記錄（CSV / JSON Lines / Parquet），不含圖表與樣式，適合大量資料"""
+        if not self.raw_data:
+            return
+        export_sheets = self.get_export_sheets()
+        if not export_sheets:
+            messagebox.showwarning("提示", "請至少勾選一個Sheet")
+            return
+
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")],
+            initialfile=f"{self.entry_end.get()}_工作明細.csv"
+        )
+        if not save_path:
+            return
+        if os.path.splitext(save_path)[1].lower() not in RECORD_EXPORT_FORMATS:
+            messagebox.showerror("錯誤", "請選擇 .csv / .jsonl / .parquet 檔案")
+            return
+        raw_data = self.raw_data
+
+        def job(progress, cancel_event):
+            return save_path, write_report_records(save_path, raw_data, export_sheets,
+                                                   progress=progress, cancel_event=cancel_event)
+
+        def on_done(result):
+            path, count = result
+            self.progress_label.config(text="")
+            messagebox.showinfo("成功", f"已匯出 {count} 筆：\n{path}")
+
+        self.run_job("匯出明細中...", job, on_done, "匯出明細")
+
+# 模組載入完成的時間點（啟動時間量測用）
+STARTUP_IMPORTED = time.perf_counter()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    # --measure-startup：開啟視窗、量測啟動時間後立即結束
+    measure_startup = sys.argv[1:] == ["--measure-startup"]
+    # --batch：批次模式，不開啟視窗
+    if "--batch" in sys.argv[1:]:
+        sys.exit(run_batch_cli(sys.argv[1:]))
+    if len(sys.argv) > 1 and not measure_startup:
+        sys.exit(f"未知的參數：{' '.join(sys.argv[1:])}（批次模式請加上 --batch）")
     root = tk.Tk()
     app = WorkReportExcelApp(root)
+    if measure_startup:
+        root.after_idle(lambda: root.after_idle(root.destroy))
     root.mainloop()
\ No newline at end of file